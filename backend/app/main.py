@@ -4,6 +4,7 @@ from typing import List, Optional
 import uuid
 import os
 import sys
+import traceback
 from dotenv import load_dotenv
 import pathlib
 from fastapi.responses import JSONResponse
@@ -137,7 +138,6 @@ async def upload_document(
     
     except Exception as e:
         print(f"UPLOAD ENDPOINT ERROR: {str(e)}")
-        import traceback
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=f"Error uploading document: {str(e)}")
 
@@ -200,7 +200,7 @@ async def delete_folder(folder_name: str):
 async def unified_ask_question(request: QuestionRequest) -> QuestionResponse:
     """Endpoint to ask a question about documents in a specific folder"""
     # Start timer
-    start_time = time.time()
+    start_time = time.perf_counter()
     
     # Print detailed request information
     print(f"{'='*80}")
@@ -244,7 +244,7 @@ async def unified_ask_question(request: QuestionRequest) -> QuestionResponse:
             request.folder,
             request.model
         )
-        elapsed = time.time() - start_time
+        elapsed = time.perf_counter() - start_time
         print(f"ENDPOINT /ask: DocumentService returned answer in {elapsed:.2f} seconds")
         
         # Preview the answer for logging
@@ -262,9 +262,8 @@ async def unified_ask_question(request: QuestionRequest) -> QuestionResponse:
         error_type = type(e).__name__
         error_msg = f"Unexpected {error_type} while processing question: {str(e)}"
         print(f"ENDPOINT /ask ERROR: {error_msg}")
-        import traceback
         print(f"ENDPOINT /ask ERROR: Full error details:\n{traceback.format_exc()}")
-        elapsed = time.time() - start_time
+        elapsed = time.perf_counter() - start_time
         print(f"ENDPOINT /ask ERROR: Request failed after {elapsed:.2f} seconds")
         return QuestionResponse(
             question=request.question,
@@ -275,7 +274,6 @@ async def unified_ask_question(request: QuestionRequest) -> QuestionResponse:
 @app.exception_handler(Exception)
 async def global_exception_handler(request, exc):
     """Global exception handler to capture more details about errors"""
-    import traceback
     error_details = {
         "error": str(exc),
         "type": type(exc).__name__,
@@ -292,7 +290,7 @@ async def global_exception_handler(request, exc):
 @app.middleware("http")
 async def log_requests(request, call_next):
     """Middleware to log all requests"""
-    start_time = time.time()
+    start_time = time.perf_counter()
     request_id = str(uuid.uuid4())
     
     print(f"REQUEST [{request_id}]: {request.method} {request.url.path}")
@@ -301,12 +299,11 @@ async def log_requests(request, call_next):
     # Process the request WITHOUT consuming the body
     try:
         response = await call_next(request)
-        process_time = time.time() - start_time
+        process_time = time.perf_counter() - start_time
         print(f"RESPONSE [{request_id}]: {response.status_code} (took {process_time:.2f}s)")
         return response
     except Exception as e:
         print(f"ERROR [{request_id}]: {str(e)}")
-        import traceback
         print(f"ERROR TRACEBACK [{request_id}]:\n{traceback.format_exc()}")
         # Re-raise the exception to be handled by the global exception handler
         raise
@@ -1,5 +1,8 @@
 from fastapi import APIRouter, File, Form, UploadFile, Depends, HTTPException
+import os
 import uuid
+import inspect
+import traceback
 from app.services.document_service import DocumentService
 from app.services.s3_service import S3Service
 from app.services.utils import get_document_service
@@ -29,9 +32,9 @@ async def upload_document(
         
         # Process the document
         print(f"ROUTER UPLOAD: Calling document_service.process_document for {file.filename}")
-        # Print the signature of the method
-        import inspect
-        print(f"ROUTER UPLOAD: Method signature: {inspect.signature(document_service.process_document)}")
+        # Print the signature of the method (reflection is only done when explicitly requested)
+        if os.getenv("DEBUG_INSPECT") == "1":
+            print(f"ROUTER UPLOAD: Method signature: {inspect.signature(document_service.process_document)}")
         
         doc_id = document_service.process_document(file.filename, content, folder)
         print(f"ROUTER UPLOAD: Document processed successfully with ID: {doc_id}")
@@ -47,7 +50,6 @@ async def upload_document(
         }
     except Exception as e:
         print(f"ROUTER UPLOAD ERROR: {str(e)}")
-        import traceback
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -152,7 +154,6 @@ async def compare_documents(
         }
     except Exception as e:
         print(f"Error comparing documents: {str(e)}")
-        import traceback
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -182,6 +183,5 @@ async def get_similar_documents(
         }
     except Exception as e:
         print(f"Error finding similar documents: {str(e)}")
-        import traceback
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e)) 
\ No newline at end of file
@@ -32,7 +32,7 @@ async def ask_question(request: QuestionRequest):
         actual_doc_ids = request.document_ids if request.document_ids else request.doc_ids
         print(f"ROUTER /ask/ - USING DOCUMENT IDs: {actual_doc_ids}")
         
-        request_time = time.time()
+        request_time = time.perf_counter()
         
         # Log the model details
         if request.model == "gpt-4-turbo":
@@ -51,7 +51,7 @@ async def ask_question(request: QuestionRequest):
             model=model
         )
         
-        response_time = time.time() - request_time
+        response_time = time.perf_counter() - request_time
         print(f"ROUTER /ask/ - GOT RESPONSE in {response_time:.2f} seconds")
         print(f"Answer length: {len(answer)} characters")
         answer_sample = answer[:200] + "..." if len(answer) > 200 else answer
@@ -119,7 +119,6 @@ async def ask_question_specific(
         return result
     except Exception as e:
         print(f"Error asking question: {str(e)}")
-        import traceback
         print(f"ROUTER /ask/questions - ERROR TRACEBACK:\n{traceback.format_exc()}")
         print(f"{'%'*100}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -1,5 +1,6 @@
 from fastapi import APIRouter, File, Form, UploadFile, Depends, HTTPException, Body
 import uuid
+import traceback
 from typing import List, Dict, Any, Optional
 from pydantic import BaseModel
 
@@ -132,7 +133,6 @@ async def upload_document_to_session(
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
-        import traceback
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -1,25 +1,28 @@
 import json
+import logging
 import os
 import fitz  # PyMuPDF
+import traceback
 from io import BytesIO
 from typing import List, Dict, Any, Optional
 from datetime import datetime
 import uuid
-import inspect
 import time
 
 from app.services.s3_service import S3Service
 from app.services.vector_db_service import VectorDBService
 
+logger = logging.getLogger(__name__)
+
 class DocumentService:
     def __init__(self, s3_service: S3Service):
         self.s3_service = s3_service
-        self.vector_db_service = VectorDBService()
+        self.vector_db_service = VectorDBService.get()
         self.metadata_folder = "metadata"
         
         # Ensure metadata folder exists
         try:
-            self.s3_service.create_folder(self.metadata_folder)
+            self.s3_service.ensure_folder(self.metadata_folder)
         except Exception as e:
             print(f"Error creating metadata folder: {str(e)}")
     
@@ -103,7 +106,6 @@ class DocumentService:
             return doc_id
         except Exception as e:
             print(f"Error processing document: {str(e)}")
-            import traceback
             traceback.print_exc()
             raise
     
@@ -134,7 +136,8 @@ class DocumentService:
         
         return text
     
-    def _split_text(self, text: str, chunk_size: int = 1500, overlap: int = 300) -> List[str]:
+    @staticmethod
+    def _split_text(text: str, chunk_size: int = 1500, overlap: int = 300) -> List[str]:
         """Split text into overlapping chunks safely, avoiding infinite loops."""
         print(f"Starting text splitting: length={len(text)}, chunk_size={chunk_size}, overlap={overlap}")
         
@@ -421,8 +424,9 @@ class DocumentService:
             print(f"DOCUMENT SERVICE: Searching directly in namespace '{folder}'")
             
             try:
-                stats = self.vector_db_service.pinecone_index.describe_index_stats()
-                print(f"DOCUMENT SERVICE: Index stats: {stats}")
+                stats = self.vector_db_service.get_index_stats()
+                print(f"DOCUMENT SERVICE: Index stats: {self.vector_db_service.summarize_index_stats(stats)}")
+                logger.debug("DOCUMENT SERVICE: Full index stats: %s", stats)
                 
                 # Check if the namespace exists and has vectors
                 namespaces = stats.get("namespaces", {})
@@ -440,14 +444,14 @@ class DocumentService:
                 print(f"DOCUMENT SERVICE WARNING: Error getting index stats: {str(stats_error)}")
             
             # Search for relevant chunks directly in the namespace matching the folder
-            start_time = time.time()
+            start_time = time.perf_counter()
             chunks = self.vector_db_service.search_similar_chunks(
                 query=question,
                 top_k=5,
                 namespace=folder  # Explicitly use the folder name as namespace
             )
             
-            search_time = time.time() - start_time
+            search_time = time.perf_counter() - start_time
             print(f"DOCUMENT SERVICE: Found {len(chunks)} relevant chunks in {search_time:.2f} seconds")
             
             # If no chunks found, return a clear message
@@ -455,21 +459,16 @@ class DocumentService:
                 print(f"DOCUMENT SERVICE WARNING: No relevant chunks found for query in namespace '{folder}'")
                 return f"I couldn't find any relevant information in the documents in folder '{folder}' to answer your question. Please try rephrasing or asking about a different topic."
             
-            # Log information about the chunks found
-            print(f"DOCUMENT SERVICE: Details of {len(chunks)} chunks:")
-            for i, chunk in enumerate(chunks):
-                chunk_id = chunk.get('id', 'unknown')
-                doc_id = chunk.get('doc_id', 'unknown')
-                score = chunk.get('score', 'unknown')
-                text_length = len(chunk.get('text', ''))
-                print(f"  Chunk {i+1}: ID={chunk_id}, Doc ID={doc_id}, Score={score}, Text length={text_length}")
+            # Log information about the chunks found (only formatted when debug logging is enabled)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("DOCUMENT SERVICE: Details of %s chunks:", len(chunks))
+                for i, chunk in enumerate(chunks):
+                    logger.debug("  Chunk %s: ID=%s, Doc ID=%s, Score=%s, Text length=%s",
+                                 i + 1, chunk.get('id', 'unknown'), chunk.get('doc_id', 'unknown'),
+                                 chunk.get('score', 'unknown'), len(chunk.get('text', '')))
             
             # Construct context from chunks
-            context = ""
-            for chunk in chunks:
-                chunk_text = chunk.get("text", "")
-                if chunk_text:
-                    context += f"{chunk_text}\n\n"
+            context = "".join(f"{chunk_text}\n\n" for chunk_text in (chunk.get("text", "") for chunk in chunks) if chunk_text)
             
             print(f"DOCUMENT SERVICE: Total context length: {len(context)} characters")
             
@@ -490,7 +489,7 @@ class DocumentService:
             
             # Call OpenAI API
             print(f"DOCUMENT SERVICE: Calling OpenAI at {time.strftime('%H:%M:%S')} with model {model}")
-            openai_start_time = time.time()
+            openai_start_time = time.perf_counter()
             
             if not hasattr(self.vector_db_service, 'openai_client') or self.vector_db_service.openai_client is None:
                 print(f"DOCUMENT SERVICE ERROR: OpenAI client not initialized")
@@ -506,7 +505,7 @@ class DocumentService:
                 timeout=30  # 30 second timeout
             )
             
-            openai_time = time.time() - openai_start_time
+            openai_time = time.perf_counter() - openai_start_time
             print(f"DOCUMENT SERVICE: OpenAI API call completed in {openai_time:.2f} seconds")
             
             # Process the response
@@ -520,7 +519,6 @@ class DocumentService:
             
         except Exception as e:
             print(f"DOCUMENT SERVICE ERROR: {str(e)}")
-            import traceback
             traceback.print_exc()
             return f"Error processing your question: {str(e)}"
     
@@ -1,11 +1,15 @@
 from typing import List, Optional, Dict, Any
 import os
+import functools
+import httpx
 import numpy as np
 from openai import OpenAI
 import logging
 import time
+import random
 import sys
 import traceback
+from concurrent.futures import ThreadPoolExecutor
 
 # Import Pinecone with proper handling for import errors
 try:
@@ -58,6 +62,42 @@ except ImportError as e:
             self.cloud = cloud
             self.region = region
 
+OPENAI_MAX_CONNECTIONS = int(os.getenv('OPENAI_MAX_CONNECTIONS', '64'))
+OPENAI_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv('OPENAI_MAX_KEEPALIVE_CONNECTIONS', '32'))
+
+@functools.lru_cache(maxsize=None)
+def get_openai_client(api_key: str) -> OpenAI:
+    """Return the process-wide OpenAI client for an API key.
+    
+    All services share one client so they reuse a single pool of warm keep-alive
+    connections instead of each paying its own TCP/TLS handshakes.
+    """
+    http_client = httpx.Client(
+        limits=httpx.Limits(max_connections=OPENAI_MAX_CONNECTIONS, max_keepalive_connections=OPENAI_MAX_KEEPALIVE_CONNECTIONS),
+        timeout=httpx.Timeout(600.0, connect=5.0)
+    )
+    return OpenAI(api_key=api_key, http_client=http_client)
+
+def get_pinecone_client(api_key: str, cloud: str, client_cls=None):
+    """Return the process-wide Pinecone client for an API key, cloud and client class.
+    
+    Services share the client instead of each constructing their own, so the
+    control-plane session and its connections are set up once per process.
+    """
+    # Resolve the default first so get_pinecone_client(key, cloud) and
+    # get_pinecone_client(key, cloud, Pinecone) share one cache entry
+    return _create_pinecone_client(api_key, cloud, client_cls or Pinecone)
+
+@functools.lru_cache(maxsize=None)
+def _create_pinecone_client(api_key: str, cloud: str, client_cls):
+    return client_cls(api_key=api_key, cloud=cloud)
+
+_rng = np.random.default_rng()
+
+def _mock_embeddings(count: int) -> List[List[float]]:
+    """Random 1536-dim mock embeddings, generated as one float32 block rather than per vector"""
+    return _rng.random((count, 1536), dtype=np.float32).tolist()
+
 class EmbeddingService:
     def __init__(self):
         # Set up logging
@@ -70,6 +110,9 @@ class EmbeddingService:
         self.model = os.getenv('EMBEDDING_MODEL', 'text-embedding-ada-002')
         self.max_retries = int(os.getenv('EMBEDDING_MAX_RETRIES', '3'))
         self.retry_delay = float(os.getenv('EMBEDDING_RETRY_DELAY', '1.0'))
+        # OpenAI accepts up to 2048 inputs per embeddings request
+        self.batch_size = min(int(os.getenv('EMBEDDING_BATCH_SIZE', '256')), 2048)
+        self.max_workers = int(os.getenv('EMBEDDING_MAX_WORKERS', '4'))
         self.cloud = os.getenv('PINECONE_CLOUD', 'aws')
         self.region = os.getenv('PINECONE_REGION', 'us-east-1')
         self.index_name = os.getenv('PINECONE_INDEX', 'radiant-documents')
@@ -80,7 +123,7 @@ class EmbeddingService:
             self.openai_client = None
             self.openai_available = False
         else:
-            self.openai_client = OpenAI(api_key=self.openai_api_key)
+            self.openai_client = get_openai_client(self.openai_api_key)
             self.openai_available = True
         
         if not self.pinecone_api_key:
@@ -95,74 +138,89 @@ class EmbeddingService:
             # Initialize Pinecone with V2 API format
             self.logger.info("Using V2 Pinecone API format")
             self.logger.info(f"Using cloud parameter: {self.cloud}")
-            pc = Pinecone(api_key=self.pinecone_api_key, cloud=self.cloud)
+            pc = get_pinecone_client(self.pinecone_api_key, self.cloud)
                     
             self.pinecone_available = True
             
             # Check if index exists and connect to it
             try:
-                # Get list of indexes
-                self.logger.info("Checking available Pinecone indexes...")
-                
+                # A single describe_index answers whether the index exists without listing every index;
+                # the list is only needed to diagnose or create a missing index
+                index_exists = False
                 try:
-                    indexes_response = pc.list_indexes()
-                    self.logger.info(f"Raw Pinecone index list response: {indexes_response}")
-                    available_indexes = [idx['name'] for idx in indexes_response.get('indexes', [])]
-                except Exception as list_err:
-                    self.logger.error(f"Error listing indexes with V2 API: {str(list_err)}")
-                    # Try again with a short delay
-                    time.sleep(1)
+                    pc.describe_index(self.index_name)
+                    index_exists = True
+                    self.logger.info(f"Found Pinecone index: '{self.index_name}'")
+                except Exception as describe_err:
+                    self.logger.info(f"Could not describe index '{self.index_name}', listing indexes: {str(describe_err)}")
+                
+                if not index_exists:
+                    # Get list of indexes
+                    self.logger.info("Checking available Pinecone indexes...")
+                
                     try:
                         indexes_response = pc.list_indexes()
-                        self.logger.info(f"Retry - Raw Pinecone index list response: {indexes_response}")
+                        self.logger.info(f"Raw Pinecone index list response: {indexes_response}")
                         available_indexes = [idx['name'] for idx in indexes_response.get('indexes', [])]
-                    except Exception as retry_err:
-                        self.logger.error(f"Retry failed - Error listing indexes: {str(retry_err)}")
-                        available_indexes = []
+                    except Exception as list_err:
+                        self.logger.error(f"Error listing indexes with V2 API: {str(list_err)}")
+                        # Try again with a short delay
+                        time.sleep(1)
+                        try:
+                            indexes_response = pc.list_indexes()
+                            self.logger.info(f"Retry - Raw Pinecone index list response: {indexes_response}")
+                            available_indexes = [idx['name'] for idx in indexes_response.get('indexes', [])]
+                        except Exception as retry_err:
+                            self.logger.error(f"Retry failed - Error listing indexes: {str(retry_err)}")
+                            available_indexes = []
                         
-                self.logger.info(f"Available Pinecone indexes: {available_indexes}")
-                self.logger.info(f"Checking for index name: '{self.index_name}'")
-                self.logger.info(f"Case-sensitive match found: {self.index_name in available_indexes}")
+                    self.logger.info(f"Available Pinecone indexes: {available_indexes}")
+                    self.logger.info(f"Checking for index name: '{self.index_name}'")
+                    self.logger.info(f"Case-sensitive match found: {self.index_name in available_indexes}")
                 
-                # Check also for case-insensitive matches which might be causing confusion
-                for idx in available_indexes:
-                    if idx.lower() == self.index_name.lower() and idx != self.index_name:
-                        self.logger.warning(f"Found case-insensitive match: '{idx}' vs target '{self.index_name}'")
-                        self.logger.warning(f"This might be causing confusion - consider using the exact case")
+                    # Check also for case-insensitive matches which might be causing confusion
+                    for idx in available_indexes:
+                        if idx.lower() == self.index_name.lower() and idx != self.index_name:
+                            self.logger.warning(f"Found case-insensitive match: '{idx}' vs target '{self.index_name}'")
+                            self.logger.warning(f"This might be causing confusion - consider using the exact case")
                 
-                if self.index_name not in available_indexes:
-                    self.logger.info(f"Creating new Pinecone index: {self.index_name}")
-                    # Create index with the appropriate dimension for text-embedding-ada-002 (1536)
-                    try:
-                        pinecone.create_index(
-                            name=self.index_name,
-                            dimension=1536,  # dimension for text-embedding-ada-002
-                            metric="cosine",
-                            spec=ServerlessSpec(
-                                cloud=self.cloud,
-                                region=self.region
+                    if self.index_name not in available_indexes:
+                        self.logger.info(f"Creating new Pinecone index: {self.index_name}")
+                        # Create index with the appropriate dimension for text-embedding-ada-002 (1536)
+                        try:
+                            # timeout=-1 returns right away instead of sleeping 5 seconds between
+                            # readiness checks; _wait_for_index_ready polls with a shorter backoff
+                            pc.create_index(
+                                name=self.index_name,
+                                dimension=1536,  # dimension for text-embedding-ada-002
+                                metric="cosine",
+                                spec=ServerlessSpec(
+                                    cloud=self.cloud,
+                                    region=self.region
+                                ),
+                                timeout=-1
                             )
-                        )
-                    except Exception as create_err:
-                        self.logger.error(f"Error creating index: {str(create_err)}")
+                            self._wait_for_index_ready(pc)
+                        except Exception as create_err:
+                            self.logger.error(f"Error creating index: {str(create_err)}")
                         
-                        # Check if it's a quota error
-                        err_str = str(create_err).lower()
-                        if "quota" in err_str or "limit" in err_str or "max pods" in err_str:
-                            self.logger.error("Detected quota limit error from Pinecone")
-                            self.logger.error("This might be due to account limitations - if you have existing indexes, try using one of those instead")
+                            # Check if it's a quota error
+                            err_str = str(create_err).lower()
+                            if "quota" in err_str or "limit" in err_str or "max pods" in err_str:
+                                self.logger.error("Detected quota limit error from Pinecone")
+                                self.logger.error("This might be due to account limitations - if you have existing indexes, try using one of those instead")
                             
-                            # Try to use an existing index if any are available
-                            if available_indexes:
-                                alternative_index = available_indexes[0]
-                                self.logger.warning(f"Will try to use existing index '{alternative_index}' instead")
-                                self.index_name = alternative_index
+                                # Try to use an existing index if any are available
+                                if available_indexes:
+                                    alternative_index = available_indexes[0]
+                                    self.logger.warning(f"Will try to use existing index '{alternative_index}' instead")
+                                    self.index_name = alternative_index
+                                else:
+                                    self.logger.error("No existing indexes found to use as an alternative")
+                                    raise
                             else:
-                                self.logger.error("No existing indexes found to use as an alternative")
+                                # Re-raise for other errors
                                 raise
-                        else:
-                            # Re-raise for other errors
-                            raise
                 
                 # Connect to the index
                 self.pinecone_index = pc.Index(self.index_name)
@@ -171,7 +229,10 @@ class EmbeddingService:
                 
                 # Test the connection
                 stats = self.pinecone_index.describe_index_stats()
-                self.logger.info(f"Index stats: {stats}")
+                # Log a summary; the full stats repr lists every namespace
+                namespaces = getattr(stats, 'namespaces', None) or (stats.get('namespaces') if isinstance(stats, dict) else None) or {}
+                total = getattr(stats, 'total_vector_count', None) or (stats.get('total_vector_count') if isinstance(stats, dict) else None) or 0
+                self.logger.info(f"Index stats: {total} vectors across {len(namespaces)} namespaces")
                 
             except Exception as e:
                 self.logger.error(f"Error with Pinecone index: {str(e)}")
@@ -184,43 +245,80 @@ class EmbeddingService:
             self.pinecone_available = False
             self.pinecone_index = None
     
-    def generate_embeddings(self, texts: List[str]) -> List[List[float]]:
+    def _wait_for_index_ready(self, pc, timeout: float = 60.0) -> bool:
+        """Poll describe_index with backoff until a newly created index reports ready, or timeout"""
+        start = time.monotonic()
+        delay = 0.5
+        while True:
+            try:
+                status = pc.describe_index(self.index_name).status
+                ready = status.get('ready') if isinstance(status, dict) else getattr(status, 'ready', False)
+                if ready:
+                    self.logger.info(f"Index '{self.index_name}' ready after {time.monotonic() - start:.1f} seconds")
+                    return True
+            except Exception as e:
+                self.logger.debug(f"Index '{self.index_name}' not describable yet: {str(e)}")
+            if time.monotonic() - start + delay > timeout:
+                self.logger.warning(f"Index '{self.index_name}' not ready after {timeout:.0f} seconds")
+                return False
+            time.sleep(delay)
+            delay = min(delay * 1.5, 4.0)
+    
+    def _create_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """Call the OpenAI embeddings API, retrying rate limits and server errors with exponential backoff"""
+        for attempt in range(self.max_retries):
+            try:
+                response = self.openai_client.embeddings.create(
+                    model=self.model,
+                    input=texts
+                )
+                # Order by the returned index so each embedding lines up with its input
+                return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+            except Exception as e:
+                status = getattr(e, 'status_code', None)
+                transient = status == 429 or (isinstance(status, int) and status >= 500) or type(e).__name__ in ('APIConnectionError', 'APITimeoutError')
+                if attempt == self.max_retries - 1 or not transient:
+                    raise
+                delay = self.retry_delay * (2 ** attempt) + random.uniform(0, self.retry_delay)
+                self.logger.warning(f"Embedding request failed (attempt {attempt + 1}/{self.max_retries}): {str(e)}. Retrying in {delay:.2f} seconds...")
+                time.sleep(delay)
+    
+    def generate_embeddings(self, texts: List[str], fallback_to_mock: bool = True) -> List[List[float]]:
         """
-        Generate embeddings for a list of texts using OpenAI's text-embedding-ada-002 model.
-        Falls back to mock embeddings if OpenAI is unavailable.
+        Generate embeddings for a list of texts using the configured OpenAI embedding model.
+        Batches are sent concurrently and results are returned in input order.
+        Falls back to mock embeddings if OpenAI is unavailable or a batch fails,
+        unless fallback_to_mock is False, in which case an error is raised instead.
         """
         if not self.openai_available:
+            if not fallback_to_mock:
+                raise ValueError("OpenAI client unavailable; cannot generate embeddings")
             self.logger.warning("OpenAI client unavailable. Using mock embeddings.")
-            return [np.random.rand(1536).tolist() for _ in texts]
+            return _mock_embeddings(len(texts))
         
-        embeddings = []
+        if not texts:
+            return []
         
-        # Process texts in batches to avoid rate limits
-        batch_size = 10
-        for i in range(0, len(texts), batch_size):
-            batch = texts[i:i+batch_size]
-            self.logger.info(f"Generating embeddings for batch of {len(batch)} texts")
-            
+        embeddings = [None] * len(texts)
+        starts = range(0, len(texts), self.batch_size)
+        
+        # Requests are network-bound, so keep several batches in flight; rate limits are
+        # handled by the backoff in _create_embeddings rather than a fixed sleep per batch
+        with ThreadPoolExecutor(max_workers=max(1, min(self.max_workers, len(starts)))) as executor:
+            futures = [(start, executor.submit(self._create_embeddings, texts[start:start + self.batch_size])) for start in starts]
+        
+        for start, future in futures:
+            batch = texts[start:start + self.batch_size]
             try:
-                # Add a small delay to avoid rate limits
-                time.sleep(0.5)
-                
-                # Generate embeddings with OpenAI
-                response = self.openai_client.embeddings.create(
-                    model="text-embedding-ada-002",
-                    input=batch
-                )
-                
-                # Extract embeddings from response
-                batch_embeddings = [item.embedding for item in response.data]
-                embeddings.extend(batch_embeddings)
-                
+                batch_embeddings = future.result()
                 self.logger.info(f"Successfully generated {len(batch_embeddings)} embeddings")
             except Exception as e:
                 self.logger.error(f"Error generating embeddings: {str(e)}")
+                if not fallback_to_mock:
+                    raise
                 # Add mock embeddings for this batch as fallback
-                mock_embeddings = [np.random.rand(1536).tolist() for _ in batch]
-                embeddings.extend(mock_embeddings)
+                batch_embeddings = _mock_embeddings(len(batch))
+            embeddings[start:start + len(batch)] = batch_embeddings
         
         return embeddings
     
@@ -275,12 +373,12 @@ class EmbeddingService:
         """Generate embedding for a single text using OpenAI."""
         if not self.openai_available:
             self.logger.warning("OpenAI client unavailable. Using mock embedding.")
-            return np.random.rand(1536).tolist()
+            return _mock_embeddings(1)[0]
         
         try:
             # Generate embedding with OpenAI
             response = self.openai_client.embeddings.create(
-                model="text-embedding-ada-002",
+                model=self.model,
                 input=text
             )
             
@@ -1,24 +1,27 @@
 import json
+import logging
 import os
 import time
 import traceback
 from typing import List, Dict, Any, Optional
-from openai import OpenAI
 
 from app.services.vector_db_service import VectorDBService
+from app.services.embedding_service import get_openai_client
 from app.services.s3_service import S3Service
 
+logger = logging.getLogger(__name__)
+
 class RAGService:
     def __init__(self):
         self.s3_service = S3Service()
-        self.vector_db_service = VectorDBService()
+        self.vector_db_service = VectorDBService.get()
         self.metadata_folder = "metadata"
         self.api_key = os.getenv('OPENAI_API_KEY')
         if not self.api_key:
             print("WARNING: OPENAI_API_KEY not set. Using mock responses.")
             self.client = None
         else:
-            self.client = OpenAI(api_key=self.api_key)
+            self.client = get_openai_client(self.api_key)
     
     def answer_question(self, question: str, document_ids: List[str], model: str = "gpt-3.5-turbo", prompt_template: Optional[str] = None) -> str:
         """Answer a question based on the documents"""
@@ -30,8 +33,8 @@ class RAGService:
         
         # Log more details about document IDs
         if document_ids:
-            for i, doc_id in enumerate(document_ids):
-                print(f"RAG SERVICE: Document ID {i+1}: '{doc_id}'")
+            # One write for the whole list instead of one print per ID
+            print("\n".join(f"RAG SERVICE: Document ID {i+1}: '{doc_id}'" for i, doc_id in enumerate(document_ids)))
         
         # Check if any document IDs look malformed
         for i, doc_id in enumerate(document_ids):
@@ -87,20 +90,22 @@ class RAGService:
                 
                 # Get index stats
                 try:
-                    stats = self.vector_db_service.pinecone_index.describe_index_stats()
-                    print(f"RAG SERVICE: Index stats: {stats}")
+                    stats = self.vector_db_service.get_index_stats()
+                    print(f"RAG SERVICE: Index stats: {self.vector_db_service.summarize_index_stats(stats)}")
+                    logger.debug("RAG SERVICE: Full index stats: %s", stats)
                     
                     # Check if any documents exist in index
-                    if "namespaces" in stats:
-                        for ns, ns_stats in stats.get("namespaces", {}).items():
-                            count = ns_stats.get("vector_count", 0)
-                            print(f"RAG SERVICE: Namespace '{ns}' contains {count} vectors")
+                    if "namespaces" in stats and stats.get("namespaces"):
+                        print("\n".join(
+                            f"RAG SERVICE: Namespace '{ns}' contains {ns_stats.get('vector_count', 0)} vectors"
+                            for ns, ns_stats in stats.get("namespaces", {}).items()
+                        ))
                 except Exception as stats_error:
                     print(f"RAG SERVICE WARNING: Error getting index stats: {str(stats_error)}")
             except Exception as ns_error:
                 print(f"RAG SERVICE WARNING: Error listing namespaces: {str(ns_error)}")
 
-            search_start_time = time.time()
+            search_start_time = time.perf_counter()
             
             # Get a mapping of potential namespaces from document IDs
             doc_namespaces = {}
@@ -108,30 +113,28 @@ class RAGService:
             
             # 1. First try with specific namespace if we can detect it
             try:
-                # Try to get namespace information for each document by looking at stats
-                if "namespaces" in stats:
-                    for namespace, ns_stats in stats.get("namespaces", {}).items():
-                        if ns_stats.get("vector_count", 0) > 0:
-                            print(f"RAG SERVICE: Trying namespace '{namespace}' which has {ns_stats.get('vector_count', 0)} vectors")
-                            
-                            # Try search in this namespace
-                            namespace_search_start = time.time()
-                            namespace_chunks = self.vector_db_service.search_similar_chunks(
-                                question, 
-                                top_k=5, 
-                                filter_doc_ids=document_ids,
-                                namespace=namespace
-                            )
-                            namespace_search_time = time.time() - namespace_search_start
-                            
-                            # If we found chunks, use them
-                            if namespace_chunks and len(namespace_chunks) > 0:
-                                print(f"RAG SERVICE: Found {len(namespace_chunks)} chunks in namespace '{namespace}' in {namespace_search_time:.2f}s")
-                                relevant_chunks = namespace_chunks
-                                found_relevant_chunks = True
-                                break
-                            else:
-                                print(f"RAG SERVICE: No chunks found in namespace '{namespace}' in {namespace_search_time:.2f}s")
+                # Non-empty namespaces in search order, precomputed once per stats snapshot
+                for namespace in self.vector_db_service.namespace_search_order():
+                    print(f"RAG SERVICE: Trying namespace '{namespace}'")
+                    
+                    # Try search in this namespace
+                    namespace_search_start = time.perf_counter()
+                    namespace_chunks = self.vector_db_service.search_similar_chunks(
+                        question, 
+                        top_k=5, 
+                        filter_doc_ids=document_ids,
+                        namespace=namespace
+                    )
+                    namespace_search_time = time.perf_counter() - namespace_search_start
+                    
+                    # If we found chunks, use them
+                    if namespace_chunks and len(namespace_chunks) > 0:
+                        print(f"RAG SERVICE: Found {len(namespace_chunks)} chunks in namespace '{namespace}' in {namespace_search_time:.2f}s")
+                        relevant_chunks = namespace_chunks
+                        found_relevant_chunks = True
+                        break
+                    else:
+                        print(f"RAG SERVICE: No chunks found in namespace '{namespace}' in {namespace_search_time:.2f}s")
             except Exception as ns_search_error:
                 print(f"RAG SERVICE WARNING: Error searching in specific namespaces: {str(ns_search_error)}")
             
@@ -167,7 +170,7 @@ class RAGService:
                 except Exception as cross_ns_error:
                     print(f"RAG SERVICE WARNING: Error in cross-namespace search: {str(cross_ns_error)}")
             
-            search_time = time.time() - search_start_time
+            search_time = time.perf_counter() - search_start_time
             print(f"RAG SERVICE: Found {len(relevant_chunks)} relevant chunks in {search_time:.2f} seconds")
             
             # Debug: Print the first chunk to help with debugging
@@ -179,22 +182,22 @@ class RAGService:
                 text_sample = first_chunk.get('text', '')[:100] + '...' if first_chunk.get('text') else 'No text available'
                 print(f"RAG SERVICE: Top chunk text sample: {text_sample}")
                 
-                # Print details of all chunks
-                print(f"RAG SERVICE: Details of all {len(relevant_chunks)} chunks:")
-                for i, chunk in enumerate(relevant_chunks):
-                    chunk_id = chunk.get('id', 'unknown')
-                    doc_id = chunk.get('doc_id', 'unknown')
-                    score = chunk.get('score', 'unknown')
-                    text_length = len(chunk.get('text', ''))
-                    print(f"  Chunk {i+1}: ID={chunk_id}, Doc ID={doc_id}, Score={score}, Text length={text_length}")
+                # Per-chunk details are only formatted when debug logging is enabled
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("RAG SERVICE: Details of all %s chunks:", len(relevant_chunks))
+                    for i, chunk in enumerate(relevant_chunks):
+                        logger.debug("  Chunk %s: ID=%s, Doc ID=%s, Score=%s, Text length=%s",
+                                     i + 1, chunk.get('id', 'unknown'), chunk.get('doc_id', 'unknown'),
+                                     chunk.get('score', 'unknown'), len(chunk.get('text', '')))
             else:
                 print("RAG SERVICE WARNING: No relevant chunks found for the query")
                 
                 # Check if the index is empty
                 try:
                     if hasattr(self.vector_db_service.pinecone_index, 'describe_index_stats'):
-                        stats = self.vector_db_service.pinecone_index.describe_index_stats()
-                        print(f"RAG SERVICE DEBUG: Pinecone index stats: {stats}")
+                        stats = self.vector_db_service.get_index_stats()
+                        print(f"RAG SERVICE DEBUG: Pinecone index stats: {self.vector_db_service.summarize_index_stats(stats)}")
+                        logger.debug("RAG SERVICE: Full index stats: %s", stats)
                         
                         vector_count = 0
                         if isinstance(stats, dict) and 'total_vector_count' in stats:
@@ -223,15 +226,17 @@ class RAGService:
                     return "I couldn't find any relevant information in the documents to answer your question. Please try rephrasing or asking about a different topic covered in the documents."
             
             # Construct context
-            context = ""
+            # Collect the pieces and join once instead of growing the string chunk by chunk
+            context_parts = []
             for chunk in relevant_chunks:
                 chunk_text = chunk.get("text", "")
                 chunk_id = chunk.get("id", "unknown")
                 if chunk_text:
-                    context += f"{chunk_text}\n\n"
-                    print(f"RAG SERVICE: Added chunk {chunk_id} to context, length: {len(chunk_text)} chars")
+                    context_parts.append(f"{chunk_text}\n\n")
+                    logger.debug("RAG SERVICE: Added chunk %s to context, length: %s chars", chunk_id, len(chunk_text))
                 else:
-                    print(f"RAG SERVICE WARNING: Chunk {chunk_id} has no text")
+                    logger.warning("RAG SERVICE WARNING: Chunk %s has no text", chunk_id)
+            context = "".join(context_parts)
             
             print(f"RAG SERVICE: Total context length for prompt: {len(context)} chars")
             
@@ -258,7 +263,7 @@ class RAGService:
             # Call OpenAI API with timeout
             print(f"RAG SERVICE: Calling OpenAI at {time.strftime('%H:%M:%S')} with model {model}")
             
-            openai_start_time = time.time()
+            openai_start_time = time.perf_counter()
             try:
                 response = self.client.chat.completions.create(
                     model=model,
@@ -269,7 +274,7 @@ class RAGService:
                     temperature=0,
                     timeout=30  # 30 second timeout to prevent hanging
                 )
-                openai_time = time.time() - openai_start_time
+                openai_time = time.perf_counter() - openai_start_time
                 print(f"RAG SERVICE: OpenAI API call completed in {openai_time:.2f} seconds")
                 
                 if response and hasattr(response, 'choices') and len(response.choices) > 0:
@@ -285,7 +290,7 @@ class RAGService:
                     return "Sorry, I encountered an error while processing your question. Please try again."
                     
             except Exception as openai_error:
-                openai_time = time.time() - openai_start_time
+                openai_time = time.perf_counter() - openai_start_time
                 error_type = type(openai_error).__name__
                 print(f"RAG SERVICE ERROR: OpenAI API call failed after {openai_time:.2f} seconds with error type {error_type}")
                 print(f"RAG SERVICE ERROR: {str(openai_error)}")
@@ -307,6 +312,5 @@ class RAGService:
             error_type = type(e).__name__
             print(f"RAG SERVICE ERROR: Exception during question answering: {error_type}")
             print(f"RAG SERVICE ERROR: {str(e)}")
-            import traceback
             print(f"RAG SERVICE ERROR: Full error details:\n{traceback.format_exc()}")
             return f"An error occurred while processing your question: {str(e)}" 
\ No newline at end of file
@@ -1,29 +1,53 @@
 import boto3
+import functools
 import os
 import time
 from io import BytesIO
+from concurrent.futures import ThreadPoolExecutor
 from botocore.exceptions import ClientError
 import json
 
+@functools.lru_cache(maxsize=1)
+def _get_s3_client():
+    """Create the boto3 S3 client on first use and share it across S3Service instances.
+    
+    Building a client loads botocore's service model, and S3Service is constructed per
+    request, so the client is created once per process (boto3 clients are thread-safe).
+    """
+    return boto3.client(
+        's3',
+        aws_access_key_id=os.getenv('AWS_ACCESS_KEY_ID'),
+        aws_secret_access_key=os.getenv('AWS_SECRET_ACCESS_KEY'),
+        region_name=os.getenv('AWS_REGION', 'us-west-2')
+    )
+
+# Prefix holding per-chunk text for the vector index (see CHUNK_TEXT_IN_S3 in vector_db_service).
+# It's application data, not a user folder, so list_folders hides it and delete_folder refuses it.
+CHUNK_TEXT_FOLDER = "_chunk_texts"
+INTERNAL_FOLDERS = frozenset({CHUNK_TEXT_FOLDER})
+
+# Buckets already confirmed to exist by this process
+_verified_buckets = set()
+# Folder markers ensured by this process via ensure_folder, as (bucket, folder) pairs
+_created_folders = set()
+
 class S3Service:
     def __init__(self):
-        self.s3_client = boto3.client(
-            's3',
-            aws_access_key_id=os.getenv('AWS_ACCESS_KEY_ID'),
-            aws_secret_access_key=os.getenv('AWS_SECRET_ACCESS_KEY'),
-            region_name=os.getenv('AWS_REGION', 'us-west-2')
-        )
+        self.s3_client = _get_s3_client()
         self.master_bucket = os.getenv('METADATA_BUCKET', 'doc-processor-metadata')
         self.metadata_folder = "metadata"
+        self.chunk_text_folder = CHUNK_TEXT_FOLDER
         
-        # Ensure the master bucket exists with retry
-        self.ensure_bucket_exists(self.master_bucket)
+        # Ensure the master bucket exists with retry (once per process)
+        if self.master_bucket not in _verified_buckets:
+            self.ensure_bucket_exists(self.master_bucket)
     
     def ensure_bucket_exists(self, bucket_name, max_retries=5):
         """Ensure bucket exists with retry logic"""
         try:
             self.s3_client.head_bucket(Bucket=bucket_name)
             print(f"Bucket {bucket_name} exists")
+            _verified_buckets.add(bucket_name)
             return True
         except ClientError as e:
             if e.response['Error']['Code'] == '404' or e.response['Error']['Code'] == 'NoSuchBucket':
@@ -42,6 +66,7 @@ class S3Service:
                                 CreateBucketConfiguration=location
                             )
                         print(f"Bucket {bucket_name} created successfully")
+                        _verified_buckets.add(bucket_name)
                         return True
                     except ClientError as create_error:
                         if create_error.response['Error']['Code'] == 'OperationAborted':
@@ -63,9 +88,14 @@ class S3Service:
         """Create a new S3 bucket or use existing"""
         region = os.getenv('AWS_REGION', 'us-east-1')
         
+        # A bucket this process already verified or created needs no head_bucket round-trip
+        if use_existing and bucket_name in _verified_buckets:
+            return f"s3://{bucket_name}"
+        
         # Check if bucket already exists
         try:
             self.s3_client.head_bucket(Bucket=bucket_name)
+            _verified_buckets.add(bucket_name)
             if use_existing:
                 return f"s3://{bucket_name}"
             else:
@@ -82,6 +112,7 @@ class S3Service:
                         Bucket=bucket_name,
                         CreateBucketConfiguration=location
                     )
+                _verified_buckets.add(bucket_name)
                 return f"s3://{bucket_name}"
             else:
                 # If it's another error, raise it
@@ -96,6 +127,18 @@ class S3Service:
         )
         return f"s3://{self.master_bucket}/{folder_name}/"
     
+    def ensure_folder(self, folder_name):
+        """Create a fixed application folder once per process.
+        
+        Services ensure their folders on every construction, so markers this process already
+        wrote are skipped. User-facing folder creation should call create_folder, which always
+        writes the marker.
+        """
+        if (self.master_bucket, folder_name) not in _created_folders:
+            self.create_folder(folder_name)
+            _created_folders.add((self.master_bucket, folder_name))
+        return f"s3://{self.master_bucket}/{folder_name}/"
+    
     def list_folders(self):
         """List all 'folders' in the master bucket"""
         try:
@@ -107,6 +150,7 @@ class S3Service:
             folders = []
             if 'CommonPrefixes' in response:
                 folders = [prefix['Prefix'].rstrip('/') for prefix in response['CommonPrefixes']]
+                folders = [folder for folder in folders if folder not in INTERNAL_FOLDERS]
             
             return folders
         except Exception as e:
@@ -115,6 +159,9 @@ class S3Service:
     
     def delete_folder(self, folder_name):
         """Delete a folder and all its contents"""
+        if folder_name.strip('/') in INTERNAL_FOLDERS:
+            print(f"Refusing to delete internal folder '{folder_name}'")
+            return False
         try:
             # List all objects with the folder prefix
             response = self.s3_client.list_objects_v2(
@@ -160,7 +207,7 @@ class S3Service:
                                     if doc_id:
                                         try:
                                             from app.services.vector_db_service import VectorDBService
-                                            vector_db = VectorDBService()
+                                            vector_db = VectorDBService.get()
                                             vector_db.delete_document(doc_id)
                                         except Exception as ve:
                                             print(f"Error deleting from vector database: {str(ve)}")
@@ -170,7 +217,7 @@ class S3Service:
             # After deleting all folder content and document records, also delete the Pinecone namespace
             try:
                 from app.services.vector_db_service import VectorDBService
-                vector_db = VectorDBService()
+                vector_db = VectorDBService.get()
                 namespace_deleted = vector_db.delete_namespace(folder_name)
                 if namespace_deleted:
                     print(f"Successfully deleted Pinecone namespace for folder '{folder_name}'")
@@ -180,6 +227,10 @@ class S3Service:
                 print(f"Error deleting Pinecone namespace: {str(ve)}")
                 # Continue with the operation even if namespace deletion fails
             
+            # The prefix delete also removed any nested folder markers
+            for bucket, folder in list(_created_folders):
+                if bucket == self.master_bucket and (folder == folder_name or folder.startswith(f"{folder_name}/")):
+                    _created_folders.discard((bucket, folder))
             return True
         except Exception as e:
             print(f"Error deleting folder: {str(e)}")
@@ -219,6 +270,7 @@ class S3Service:
             
             # Then delete the bucket
             self.s3_client.delete_bucket(Bucket=bucket_name)
+            _verified_buckets.discard(bucket_name)
             return True
         except ClientError as e:
             if force:
@@ -231,15 +283,16 @@ class S3Service:
         """Ensure that required folders exist in the bucket"""
         required_folders = ["metadata", "documents"]
         
-        for folder in required_folders:
+        def ensure_folder(folder):
             try:
-                self.s3_client.put_object(
-                    Bucket=self.master_bucket,
-                    Key=f"{folder}/"
-                )
+                self.ensure_folder(folder)
                 print(f"Ensured {folder}/ folder exists")
             except Exception as e:
                 print(f"Error ensuring {folder}/ folder exists: {str(e)}")
+        
+        # The marker writes are independent round-trips, so issue them concurrently
+        with ThreadPoolExecutor(max_workers=len(required_folders)) as executor:
+            list(executor.map(ensure_folder, required_folders))
 
     def upload_file_content(self, folder: str, filename: str, content: bytes) -> bool:
         """Upload file content to S3"""
@@ -2,8 +2,10 @@ import json
 import os
 import uuid
 import re
+import traceback
 from typing import List, Dict, Any, Optional
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 
 from app.services.s3_service import S3Service
 from app.services.vector_db_service import VectorDBService
@@ -14,15 +16,15 @@ class SessionService:
     
     def __init__(self, s3_service: S3Service):
         self.s3_service = s3_service
-        self.vector_db_service = VectorDBService()
+        self.vector_db_service = VectorDBService.get()
         self.document_service = DocumentService(s3_service)
         self.sessions_folder = "sessions"
         self.session_metadata_folder = "session_metadata"
         
         # Ensure required folders exist
         try:
-            self.s3_service.create_folder(self.sessions_folder)
-            self.s3_service.create_folder(self.session_metadata_folder)
+            self.s3_service.ensure_folder(self.sessions_folder)
+            self.s3_service.ensure_folder(self.session_metadata_folder)
         except Exception as e:
             print(f"Error ensuring session folders: {str(e)}")
     
@@ -65,7 +67,6 @@ class SessionService:
             return session_metadata
         except Exception as e:
             print(f"Error creating session: {str(e)}")
-            import traceback
             traceback.print_exc()
             raise
     
@@ -328,7 +329,6 @@ class SessionService:
             return document
         except Exception as e:
             print(f"Error processing document in session: {str(e)}")
-            import traceback
             traceback.print_exc()
             raise
     
@@ -472,7 +472,6 @@ class SessionService:
             return new_bucket, similarity_logs
         except Exception as e:
             print(f"Error determining similarity bucket: {str(e)}")
-            import traceback
             traceback.print_exc()
             # Default to a numbered bucket
             similarity_buckets = self._get_session_folders(session_id)
@@ -526,10 +525,21 @@ class SessionService:
             print(f"Error getting session folders: {str(e)}")
             return []
     
-    def _get_folder_documents(self, session_id: str, folder: str) -> List[Dict[str, Any]]:
+    def _get_folders_documents(self, session_id: str, folders: List[str], session: Dict[str, Any] = None) -> List[List[Dict[str, Any]]]:
+        """Get the documents of several session folders concurrently, returned in folder order"""
+        if not folders:
+            return []
+        if session is None:
+            session = self.get_session(session_id)
+        # Each folder is an independent S3 listing, so list them in parallel
+        with ThreadPoolExecutor(max_workers=min(8, len(folders))) as executor:
+            return list(executor.map(lambda folder: self._get_folder_documents(session_id, folder, session), folders))
+    
+    def _get_folder_documents(self, session_id: str, folder: str, session: Dict[str, Any] = None) -> List[Dict[str, Any]]:
         """Get documents in a specific folder of a session"""
         try:
-            session = self.get_session(session_id)
+            if session is None:
+                session = self.get_session(session_id)
             session_folder = session["folder_path"]
             full_folder_path = f"{session_folder}/{folder}"
             
@@ -606,10 +616,7 @@ class SessionService:
             session = self.get_session(session_id)
             folders = self._get_session_folders(session_id)
             
-            document_count = 0
-            for folder in folders:
-                folder_docs = self._get_folder_documents(session_id, folder)
-                document_count += len(folder_docs)
+            document_count = sum(len(folder_docs) for folder_docs in self._get_folders_documents(session_id, folders, session))
             
             # Update session metadata
             session["document_count"] = document_count
@@ -632,9 +639,7 @@ class SessionService:
             folders = self._get_session_folders(session_id)
             
             documents = []
-            for folder in folders:
-                folder_docs = self._get_folder_documents(session_id, folder)
-                
+            for folder_docs in self._get_folders_documents(session_id, folders, session):
                 # Add folder info to each document
                 for doc in folder_docs:
                     doc["session_id"] = session_id
@@ -653,9 +658,7 @@ class SessionService:
             folders = self._get_session_folders(session_id)
             
             folder_stats = []
-            for folder in folders:
-                folder_docs = self._get_folder_documents(session_id, folder)
-                
+            for folder, folder_docs in zip(folders, self._get_folders_documents(session_id, folders, session)):
                 folder_stats.append({
                     "folder": folder,
                     "document_count": len(folder_docs),
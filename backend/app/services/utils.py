@@ -1,10 +1,14 @@
+import functools
+
 from app.services.s3_service import S3Service
 from app.services.document_service import DocumentService
 
+@functools.lru_cache(maxsize=1)
 def get_document_service():
     """
     Dependency function to get a DocumentService instance.
     This can be used with FastAPI's Depends() to inject a DocumentService.
+    The service holds no per-request state, so one instance is shared by all requests.
     """
     s3_service = S3Service()
     return DocumentService(s3_service) 
\ No newline at end of file
@@ -1,14 +1,22 @@
 import os
 import json
 import hashlib
-from typing import List, Dict, Any, Optional
-from openai import OpenAI
+from typing import List, Dict, Any, Optional, Tuple
 import traceback
 import time
 from datetime import datetime
-from dotenv import load_dotenv
+from dotenv import dotenv_values
 import pathlib
 import sys
+import logging
+import random
+import threading
+import sqlite3
+import heapq
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from operator import itemgetter
+import numpy as np
 
 # Import the Pinecone client and our EmbeddingService
 try:
@@ -16,6 +24,7 @@ try:
     # Import V2 API directly
     import pinecone
     from pinecone import Pinecone, ServerlessSpec
+    from pinecone.exceptions import PineconeApiException
     print(f"Successfully imported Pinecone (V2 API), version: {pinecone.__version__}")
     PINECONE_IMPORT_SUCCESS = True
     
@@ -26,6 +35,14 @@ try:
         print(f"Imported pinecone-client version: {pinecone_version}")
     except Exception as ver_error:
         print(f"Could not determine Pinecone version: {str(ver_error)}")
+    
+    # The gRPC client ships with the pinecone-client[grpc] extra; fall back to REST without it
+    try:
+        from pinecone.grpc import PineconeGRPC
+        PINECONE_GRPC_AVAILABLE = True
+    except ImportError as grpc_error:
+        print(f"Pinecone gRPC client not available, using REST: {str(grpc_error)}")
+        PINECONE_GRPC_AVAILABLE = False
 except ImportError as e:
     print(f"WARNING: Failed to import from pinecone package due to ImportError: {str(e)}")
     print(f"This usually means the package is not installed or the wrong version is installed")
@@ -41,6 +58,14 @@ except ImportError as e:
     except Exception as pkg_error:
         print(f"Could not list installed packages: {str(pkg_error)}")
     PINECONE_IMPORT_SUCCESS = False
+except Exception as e:
+    print(f"WARNING: Failed to import from pinecone package due to unexpected error: {str(e)}")
+    print(f"Exception type: {type(e).__name__}")
+    print(f"Exception details:\n{traceback.format_exc()}")
+    PINECONE_IMPORT_SUCCESS = False
+
+if not PINECONE_IMPORT_SUCCESS:
+    PINECONE_GRPC_AVAILABLE = False
     
     # Create a mock pinecone module with basic functionality
     import types
@@ -59,7 +84,7 @@ except ImportError as e:
             print(f"WARNING: Using mock Pinecone class due to import failure")
             self.api_key = api_key
         
-        def Index(self, index_name):
+        def Index(self, index_name, **kwargs):
             return SimpleMockIndex()
         
         def list_indexes(self):
@@ -69,66 +94,50 @@ except ImportError as e:
         def __init__(self, cloud, region):
             self.cloud = cloud
             self.region = region
-except Exception as e:
-    print(f"WARNING: Failed to import from pinecone package due to unexpected error: {str(e)}")
-    print(f"Exception type: {type(e).__name__}")
-    print(f"Exception details:\n{traceback.format_exc()}")
-    PINECONE_IMPORT_SUCCESS = False
     
-    # Define a stub Pinecone class to avoid errors
-    class Pinecone:
-        def __init__(self, api_key, **kwargs):
-            print(f"WARNING: Using mock Pinecone class due to import failure")
-            self.api_key = api_key
-        
-        def Index(self, index_name):
-            return SimpleMockIndex()
-        
-        def list_indexes(self):
-            return {"indexes": []}
+    class PineconeApiException(Exception):
+        pass
 
-from app.services.embedding_service import EmbeddingService
+from app.services.embedding_service import EmbeddingService, get_openai_client, get_pinecone_client
 
 # Get the absolute path to the .env file
 env_path = pathlib.Path(__file__).parent.parent.parent / '.env'
 print(f"Looking for .env file at: {env_path}")
 
 # Check if .env file exists and log some diagnostic info about it
+env_values = {}
 if os.path.exists(env_path):
     try:
         print(f"INFO: .env file found, size: {os.path.getsize(env_path)} bytes")
-        with open(env_path, 'r') as f:
-            env_content = f.readlines()
-            print(f"INFO: .env file contains {len(env_content)} lines")
-            # Print a sanitized version of the .env file for debugging
-            print(f"DEBUG: Sanitized .env content:")
-            for line in env_content:
-                line = line.strip()
-                if not line or line.startswith('#'):
-                    # Skip empty lines and comments
-                    continue
-                if '=' in line:
-                    key, value = line.split('=', 1)
-                    # Mask sensitive values
-                    if any(sensitive in key.upper() for sensitive in ['API_KEY', 'SECRET', 'PASSWORD', 'TOKEN']):
-                        print(f"  {key}=****")
-                    else:
-                        print(f"  {key}={value}")
+        # Parse the file once; the same values feed the diagnostics below and os.environ
+        env_values = dotenv_values(env_path)
+        print(f"INFO: .env file contains {len(env_values)} variables")
+        # Print a sanitized version of the .env file for debugging, as a single write
+        sensitive_markers = ('API_KEY', 'SECRET', 'PASSWORD', 'TOKEN')
+        lines = ["DEBUG: Sanitized .env content:"]
+        for key, value in env_values.items():
+            # Mask sensitive values
+            key_upper = key.upper()
+            if any(sensitive in key_upper for sensitive in sensitive_markers):
+                lines.append(f"  {key}=****")
+            else:
+                lines.append(f"  {key}={value}")
+        print("\n".join(lines))
     except Exception as e:
         print(f"ERROR reading .env file: {str(e)}")
 else:
     print(f"WARNING: .env file not found at {env_path}")
     # List environment directories to help debug
     parent_dir = env_path.parent
-    print(f"Contents of parent directory ({parent_dir}):")
     try:
-        for item in os.listdir(parent_dir):
-            print(f"  {item}")
+        print("\n".join([f"Contents of parent directory ({parent_dir}):"] + [f"  {item}" for item in os.listdir(parent_dir)]))
     except Exception as e:
         print(f"ERROR listing parent directory: {str(e)}")
 
-# Get environment variables from the specified path
-load_dotenv(dotenv_path=env_path)
+# Get environment variables from the parsed file (existing variables take precedence, as with load_dotenv)
+for key, value in env_values.items():
+    if value is not None:
+        os.environ.setdefault(key, value)
 
 # Check if environment variables are loaded
 openai_api_key = os.getenv('OPENAI_API_KEY')
@@ -208,16 +217,290 @@ class SimpleMockIndex:
     def describe_index_stats(self):
         return {"namespaces": {"default": {"vector_count": 0}}}
 
+logger = logging.getLogger(__name__)
+
 # Check if debug mode is enabled
 DEBUG_PINECONE = os.getenv('DEBUG_PINECONE', '').lower() == 'true'
 if DEBUG_PINECONE:
     print("DEBUG MODE ENABLED: Detailed Pinecone diagnostics will be shown")
 
+# Sentinel distinguishing "attribute missing" from an attribute whose value is None
+_MISSING = object()
+
+PINECONE_MAX_RETRIES = int(os.getenv('PINECONE_MAX_RETRIES', '5'))
+CROSS_NAMESPACE_MAX_WORKERS = int(os.getenv('CROSS_NAMESPACE_MAX_WORKERS', '16'))
+# Opt in to the gRPC transport; REST is the default. It needs the optional extra, installed separately:
+#   pip install "pinecone-client[grpc]==3.0.0"
+PINECONE_USE_GRPC = PINECONE_GRPC_AVAILABLE and os.getenv('PINECONE_USE_GRPC', 'false').lower() == 'true'
+# Optional number of decimals to round embedding values to before a REST upsert (unset = full precision)
+PINECONE_UPSERT_DECIMALS = os.getenv('PINECONE_UPSERT_DECIMALS')
+PINECONE_UPSERT_DECIMALS = int(PINECONE_UPSERT_DECIMALS) if PINECONE_UPSERT_DECIMALS else None
+# Vectors per upsert request. Pinecone caps a request at 2 MB; a 1536-dim vector is ~6 KB as packed
+# gRPC floats but ~30 KB as REST JSON, so the REST default is smaller
+PINECONE_UPSERT_BATCH_SIZE = int(os.getenv('PINECONE_UPSERT_BATCH_SIZE', '100' if PINECONE_USE_GRPC else '50'))
+PINECONE_UPSERT_WORKERS = int(os.getenv('PINECONE_UPSERT_WORKERS', '4'))
+# Placeholder query vector for filter-only queries, built once instead of per call
+_FILTER_ONLY_QUERY_VECTOR = [0.0] * 1536
+# Keep chunk text in S3 (under S3Service.chunk_text_folder) instead of Pinecone metadata, fetching it only
+# for returned results. Chunk texts are removed on delete only while the flag is on, so documents stored
+# with it enabled should be deleted before turning it off.
+CHUNK_TEXT_IN_S3 = os.getenv('CHUNK_TEXT_IN_S3', 'false').lower() == 'true'
+
+def _compact_embedding(embedding: List[float]) -> List[float]:
+    """Round embedding values so the JSON upsert payload carries fewer digits per float.
+    
+    Dense Pinecone indexes only store float32, so fp16/int8 values can't be sent directly.
+    On the REST transport every float is serialized as text, and rounding to 5 decimals
+    (finer than fp16 resolution for unit-norm 1536-dim embeddings) cuts the payload by more
+    than half. gRPC already packs float32, so the values are left untouched there.
+    """
+    if PINECONE_UPSERT_DECIMALS is None or PINECONE_USE_GRPC:
+        return embedding
+    return np.round(np.asarray(embedding, dtype=np.float64), PINECONE_UPSERT_DECIMALS).tolist()
+
+# gRPC status codes worth retrying (the gRPC equivalents of 503 and 429)
+TRANSIENT_GRPC_CODES = {"UNAVAILABLE", "RESOURCE_EXHAUSTED"}
+
+def _grpc_status_name(error: Exception) -> Optional[str]:
+    """Return the gRPC status code name behind an error, if any.
+    
+    The Pinecone gRPC client re-raises RpcErrors as a plain PineconeException chained to the
+    original error, so the cause is checked as well as the error itself.
+    """
+    for candidate in (error, error.__cause__, error.__context__):
+        code = getattr(candidate, 'code', None)
+        if callable(code):
+            try:
+                return getattr(code(), 'name', None)
+            except Exception:
+                return None
+    return None
+
+def _is_transient_error(error: Exception) -> bool:
+    """Return True for rate limiting, server-side and connection errors worth retrying"""
+    status = getattr(error, 'status', None)
+    if isinstance(status, int):
+        return status == 429 or status >= 500
+    if isinstance(error, (ConnectionError, TimeoutError)):
+        return True
+    if _grpc_status_name(error) in TRANSIENT_GRPC_CODES:
+        return True
+    # urllib3 transport errors (used by the Pinecone REST client) don't subclass ConnectionError
+    return type(error).__module__.startswith('urllib3')
+
+def _doc_id_filter(doc_ids: Optional[List[str]]) -> Optional[Dict[str, Any]]:
+    """Pinecone metadata filter restricting a query to the given documents (None for no restriction)"""
+    return {"doc_id": {"$in": list(doc_ids)}} if doc_ids else None
+
+def _is_pinecone_api_error(error: Exception) -> bool:
+    """Return True for errors reported by the Pinecone service or its transport, as opposed to bugs in our code"""
+    return isinstance(error, PineconeApiException) or _grpc_status_name(error) is not None or _is_transient_error(error)
+
+def _with_retry(fn, *args, retries: int = PINECONE_MAX_RETRIES, initial_delay: float = 1.0, max_delay: float = 30.0, **kwargs):
+    """Call a Pinecone client method, retrying transient failures with exponential backoff and jitter"""
+    for attempt in range(retries):
+        try:
+            return fn(*args, **kwargs)
+        except Exception as e:
+            if attempt == retries - 1 or not _is_transient_error(e):
+                raise
+            # Jitter keeps many workers from retrying in lockstep after a shared outage
+            delay = min(max_delay, initial_delay * (2 ** attempt)) + random.uniform(0, initial_delay)
+            logger.warning("Pinecone call %s failed (attempt %s/%s): %s. Retrying in %.2f seconds...",
+                           getattr(fn, '__name__', fn), attempt + 1, retries, e, delay)
+            time.sleep(delay)
+
+class SearchResultCache:
+    """Thread-safe LRU cache of formatted search results with a time-to-live.
+    
+    Shared by every VectorDBService instance so that an upsert or delete made through
+    one service invalidates results cached by the others. Invalidation can't reach other
+    worker processes, so the TTL bounds how stale their results can be; keep it short.
+    A ttl of 0 disables the cache.
+    """
+    def __init__(self, maxsize: int = 1024, ttl: float = 5.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def make_key(query: str, top_k: int, namespace: Optional[str], doc_ids: Optional[List[str]] = None) -> Tuple[Optional[str], int, str]:
+        """Key on a fixed-size digest of the query (and any doc_id filter) so long queries don't bloat the cache"""
+        digest = hashlib.blake2b(query.encode('utf-8'), digest_size=16)
+        if doc_ids:
+            digest.update("\0".join(["", *sorted(doc_ids)]).encode('utf-8'))
+        return (namespace, top_k, digest.hexdigest())
+    
+    def get(self, key) -> Optional[List[Dict[str, Any]]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.monotonic() - entry[0] >= self.ttl:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            # Hand out copies so callers can't mutate the cached results
+            return [dict(result) for result in entry[1]]
+    
+    def put(self, key, results: List[Dict[str, Any]]):
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic(), [dict(result) for result in results])
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+    
+    def invalidate_namespace(self, namespace: Optional[str]):
+        """Drop results for a namespace, plus unscoped (namespace=None) searches"""
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == namespace or k[0] is None]:
+                del self._entries[key]
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+    
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl
+            }
+
+class EmbeddingCache:
+    """Thread-safe LRU cache of embeddings keyed on a digest of (model, text).
+    
+    Duplicate chunks (headers, footers, repeated passages) and repeated queries reuse the
+    stored vector instead of calling the embedding API again. Vectors are held as float32
+    arrays (about 6 KB for 1536 dimensions), so the default 10,000 entries stay around 60 MB.
+    
+    When a path is given, entries are also written through to a SQLite file so the cache
+    survives process restarts; in-memory misses are looked up there before giving up. The file
+    keeps at most max_rows vectors (the default 50,000 is around 300 MB); older writes are
+    pruned first.
+    """
+    def __init__(self, maxsize: int = 10000, path: Optional[str] = None, max_rows: int = 50000):
+        self.maxsize = maxsize
+        self.max_rows = max_rows
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        if path:
+            try:
+                self._db = sqlite3.connect(path, check_same_thread=False)
+                self._db.execute("CREATE TABLE IF NOT EXISTS embeddings (key BLOB PRIMARY KEY, vector BLOB NOT NULL)")
+                self._db.commit()
+            except sqlite3.Error as e:
+                logger.warning("Could not open persistent embedding cache at %s: %s", path, e)
+                self._db = None
+    
+    @staticmethod
+    def make_key(model: str, text: str) -> bytes:
+        return hashlib.blake2b(f"{model}\0{text}".encode('utf-8'), digest_size=16).digest()
+    
+    def get(self, key: bytes, as_array: bool = False):
+        """Return the cached embedding as a list, or as a read-only float32 array when as_array is set"""
+        with self._lock:
+            vector = self._entries.get(key)
+            if vector is None and self._db is not None:
+                row = self._db.execute("SELECT vector FROM embeddings WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    vector = np.frombuffer(row[0], dtype=np.float32)
+                    self._store(key, vector)
+            if vector is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return vector if as_array else vector.tolist()
+    
+    def put(self, key: bytes, embedding: List[float]):
+        self.put_many([(key, embedding)])
+    
+    def put_many(self, items: List[Tuple[bytes, List[float]]]):
+        """Store several embeddings, persisting them in one SQLite transaction (a single commit)"""
+        vectors = []
+        for key, embedding in items:
+            vector = np.array(embedding, dtype=np.float32)
+            # Cached arrays are handed out without copying, so callers must not mutate them
+            vector.flags.writeable = False
+            vectors.append((key, vector))
+        if not vectors:
+            return
+        with self._lock:
+            for key, vector in vectors:
+                self._store(key, vector)
+            if self._db is not None:
+                try:
+                    with self._db:
+                        self._db.executemany("INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                                             [(key, vector.tobytes()) for key, vector in vectors])
+                        # INSERT OR REPLACE assigns max(rowid) + 1, so rowids follow write order and anything
+                        # more than max_rows behind the newest row is old; this is a range delete on the rowid
+                        self._db.execute("DELETE FROM embeddings WHERE rowid <= (SELECT max(rowid) FROM embeddings) - ?",
+                                         (self.max_rows,))
+                except sqlite3.Error as e:
+                    logger.warning("Could not persist %s embeddings: %s", len(vectors), e)
+    
+    def _store(self, key: bytes, vector):
+        self._entries[key] = vector
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+embedding_cache = EmbeddingCache(
+    maxsize=int(os.getenv('EMBEDDING_CACHE_SIZE', '10000')),
+    path=os.getenv('EMBEDDING_CACHE_PATH'),
+    max_rows=int(os.getenv('EMBEDDING_CACHE_DB_MAX_ROWS', '50000'))
+)
+
+# The TTL is short by default because uploads and deletes in other worker processes
+# only become visible here once cached results expire
+search_result_cache = SearchResultCache(
+    maxsize=int(os.getenv('SEARCH_CACHE_SIZE', '1024')),
+    ttl=float(os.getenv('SEARCH_CACHE_TTL', '5'))
+)
+
+_instance_lock = threading.Lock()
+_instance = None
+
 class VectorDBService:
+    @classmethod
+    def get(cls) -> "VectorDBService":
+        """Return the process-wide shared service, initializing it on first use.
+        
+        Initialization creates the OpenAI and Pinecone clients and verifies the index, so
+        services and request handlers should share one instance rather than constructing
+        their own. A failed initialization is not cached and is retried on the next call.
+        """
+        global _instance
+        if _instance is None:
+            with _instance_lock:
+                if _instance is None:
+                    _instance = cls()
+        return _instance
+    
     def __init__(self, index_name: str = None, namespace: str = "default"):
         """Initialize the Vector DB service, connected to the specified index and namespace"""
         # Initialize pinecone_index to None at the start
         self.pinecone_index = None
+        # (fetched_at, stats, namespace_search_order) from the last describe_index_stats call, see get_index_stats
+        self._stats_cache: Optional[Tuple[float, Any, List[str]]] = None
+        # Created on first use by _get_s3_service
+        self._s3_service = None
         
         try:
             print(f"Initializing VectorDBService with index_name='{index_name}', namespace='{namespace}'")
@@ -243,7 +526,7 @@ class VectorDBService:
             print(f"Successfully created embedding service")
             
             # Initialize OpenAI client
-            self.openai_client = OpenAI(api_key=self.openai_api_key)
+            self.openai_client = get_openai_client(self.openai_api_key)
             print(f"Successfully initialized OpenAI client")
             
             # Set the index_name to use
@@ -292,17 +575,27 @@ class VectorDBService:
                     raise ValueError("PINECONE_REGION environment variable is required but not set")
                 
                 print(f"DEBUG: Initializing Pinecone with cloud={self.pinecone_cloud}, region={self.pinecone_region}")
-                self.pc = Pinecone(api_key=self.pinecone_api_key, cloud=self.pinecone_cloud)
-                print(f"DEBUG: Pinecone client initialized successfully")
+                if PINECONE_USE_GRPC:
+                    # gRPC multiplexes requests over one HTTP/2 connection and sends vectors as
+                    # packed protobuf floats instead of JSON; upsert/query/describe_index_stats
+                    # keep the same call signatures
+                    self.pc = get_pinecone_client(self.pinecone_api_key, self.pinecone_cloud, PineconeGRPC)
+                    print(f"DEBUG: Pinecone gRPC client initialized successfully")
+                else:
+                    self.pc = get_pinecone_client(self.pinecone_api_key, self.pinecone_cloud, Pinecone)
+                    print(f"DEBUG: Pinecone client initialized successfully")
                 
                 # Connect to the index
                 print(f"DEBUG: Connecting to index '{self.index_name}'...")
+                # pinecone-client 3.0.0's REST index keeps a urllib3 pool of cpu_count() * 5
+                # connections, which already covers the concurrent fan-outs in this service
                 self.pinecone_index = self.pc.Index(self.index_name)
                 print(f"DEBUG: Successfully connected to index")
                 
                 # Test the connection
-                stats = self.pinecone_index.describe_index_stats()
-                print(f"DEBUG: Index stats: {stats}")
+                stats = self.get_index_stats()
+                logger.debug("Index stats: %s", self.summarize_index_stats(stats))
+                logger.debug("Full index stats: %s", stats)
                 return
             except Exception as e:
                 print(f"ERROR: Failed to initialize Pinecone client: {str(e)}")
@@ -318,138 +611,176 @@ class VectorDBService:
             print(f"ERROR: Failed to initialize VectorDBService: {str(e)}")
             raise ValueError(f"Failed to initialize VectorDBService: {str(e)}")
     
+    def _get_stats_snapshot(self, max_age: float = 30.0) -> Tuple[float, Any, List[str]]:
+        """Return the (timestamp, stats, namespace order) snapshot, refreshing it when older than max_age seconds.
+        
+        Callers read everything from the returned tuple, never from self._stats_cache again, since another
+        thread may replace or invalidate the cache in between.
+        """
+        cached = self._stats_cache
+        if cached is not None and time.monotonic() - cached[0] < max_age:
+            return cached
+        
+        stats = _with_retry(self.pinecone_index.describe_index_stats)
+        # Derived data is computed once per snapshot and stored with it so readers never see a mismatched pair
+        snapshot = (time.monotonic(), stats, self._build_namespace_search_order(stats))
+        self._stats_cache = snapshot
+        return snapshot
+    
+    def get_index_stats(self, max_age: float = 30.0):
+        """Return describe_index_stats(), reusing a cached snapshot younger than max_age seconds"""
+        return self._get_stats_snapshot(max_age=max_age)[1]
+    
+    def summarize_index_stats(self, stats) -> str:
+        """One-line summary of index stats for logs; the full stats repr grows with the number of namespaces"""
+        namespaces = self._safe_get_value(stats, 'namespaces') or {}
+        total = self._safe_get_value(stats, 'total_vector_count') or 0
+        return f"{total} vectors across {len(namespaces)} namespaces"
+    
+    def _build_namespace_search_order(self, stats) -> List[str]:
+        """Non-empty namespaces, 'default' and 'root' first, then by vector count (highest first)"""
+        namespaces = self._safe_get_value(stats, 'namespaces') or {}
+        counts = {ns: self._safe_get_value(ns_stats, 'vector_count') or 0 for ns, ns_stats in namespaces.items()}
+        pinned = [ns for ns in ("default", "root") if counts.get(ns, 0) > 0]
+        rest = sorted((ns for ns, count in counts.items() if count > 0 and ns not in pinned), key=lambda ns: -counts[ns])
+        return pinned + rest
+    
+    def namespace_search_order(self, max_age: float = 30.0) -> List[str]:
+        """Return the order in which to try namespaces when searching for a document's chunks"""
+        return list(self._get_stats_snapshot(max_age=max_age)[2])
+    
+    def _namespace_vector_count(self, namespace: str, max_age: float = 30.0) -> int:
+        """Return the number of vectors in a namespace according to the index stats (0 if it doesn't exist)"""
+        namespaces = self._safe_get_value(self.get_index_stats(max_age=max_age), 'namespaces') or {}
+        namespace_stats = namespaces.get(namespace)
+        if namespace_stats is None:
+            return 0
+        return self._safe_get_value(namespace_stats, 'vector_count') or 0
+    
+    def _invalidate_index_stats(self):
+        """Drop the cached index stats so the next read sees fresh namespaces and counts"""
+        self._stats_cache = None
+    
+    @property
+    def cache_stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for the shared search result and embedding caches"""
+        stats = search_result_cache.stats()
+        stats["embedding_hits"] = embedding_cache.hits
+        stats["embedding_misses"] = embedding_cache.misses
+        return stats
+    
     def _safe_get_value(self, obj, key):
         """Safely extract a value from a Pinecone object or dictionary"""
-        try:
-            # Try attribute access first (for Pinecone objects)
-            if hasattr(obj, key):
-                return getattr(obj, key)
-            # Then try dictionary access
-            elif isinstance(obj, dict) and key in obj:
+        # Try attribute access first (for Pinecone objects) with a single lookup
+        value = getattr(obj, key, _MISSING)
+        if value is not _MISSING:
+            return value
+        # Then try dictionary access
+        if isinstance(obj, dict):
+            return obj.get(key)
+        # For mapping-like response objects that only support item access
+        if hasattr(obj, '__getitem__') and not isinstance(obj, (str, bytes)):
+            try:
                 return obj[key]
-            # For list-like objects that might be wrapped
-            elif hasattr(obj, '__getitem__'):
-                try:
-                    return obj[key]
-                except:
-                    return None
-            return None
-        except Exception as e:
-            print(f"DEBUG: Error extracting '{key}' from object: {str(e)}")
-            return None
+            except (KeyError, IndexError, TypeError) as e:
+                logger.debug("Error extracting '%s' from object: %s", key, e)
+        return None
 
+    def _response_count(self, result, field: str) -> int:
+        """Read a count such as upserted_count from a REST response or a gRPC protobuf message"""
+        if result is None:
+            return 0
+        # Protobuf messages only support attribute access; REST responses may be plain dicts
+        value = getattr(result, field, None)
+        if value is None:
+            value = self._safe_get_value(result, field)
+        return int(value or 0)
+    
+    def _extract_index_names_generic(self, indexes) -> List[str]:
+        """Extract index names from any supported list_indexes() response shape"""
+        available_indexes = []
+        try:
+            # Get the list of indexes from V2 API response
+            index_list = self._safe_get_value(indexes, 'indexes')
+            if not index_list:
+                return available_indexes
+            
+            # Extract names from the index objects
+            for idx in index_list:
+                name = self._safe_get_value(idx, 'name')
+                if name:
+                    available_indexes.append(name)
+                else:
+                    logger.debug("Could not extract name from index: %s", idx)
+        except Exception as e:
+            logger.debug("Error extracting names: %s", e)
+        return available_indexes
+    
     def _ensure_index_exists(self):
         """Check if the index exists and create it if it doesn't"""
         try:
             # List all indexes with retry mechanism
-            print(f"DEBUG: Listing all Pinecone indexes...")
-            print(f"DEBUG: Using API key beginning with: {self.pinecone_api_key[:5]}...")
-            print(f"DEBUG: Current environment settings:")
-            print(f"  - PINECONE_INDEX: {self.index_name}")
-            print(f"  - PINECONE_CLOUD: {self.pinecone_cloud}")
-            print(f"  - PINECONE_REGION: {self.pinecone_region}")
-            
-            max_retries = 3
-            retry_delay = 1  # Start with 1 second delay
-            indexes = None
-            
-            for retry in range(max_retries):
-                try:
-                    print(f"DEBUG: Attempting to list indexes (attempt {retry + 1}/{max_retries})")
-                    indexes = self.pc.list_indexes()
-                    if indexes:
-                        break
-                except Exception as e:
-                    print(f"DEBUG: Error listing indexes on attempt {retry + 1}: {str(e)}")
-                    if retry < max_retries - 1:
-                        print(f"DEBUG: Retrying in {retry_delay} seconds...")
-                        time.sleep(retry_delay)
-                        retry_delay *= 2  # Exponential backoff
-                    else:
-                        print(f"DEBUG: All retry attempts failed")
-                        raise e
+            logger.debug("Listing all Pinecone indexes...")
+            logger.debug("Using API key beginning with: %s...", self.pinecone_api_key[:5])
+            logger.debug("Current environment settings:")
+            logger.debug("  - PINECONE_INDEX: %s", self.index_name)
+            logger.debug("  - PINECONE_CLOUD: %s", self.pinecone_cloud)
+            logger.debug("  - PINECONE_REGION: %s", self.pinecone_region)
+            
+            indexes = _with_retry(self.pc.list_indexes)
             
             if not indexes:
-                print(f"DEBUG: Failed to get index list after {max_retries} attempts")
+                logger.debug("Pinecone returned an empty index list")
                 return False
                 
-            print(f"DEBUG: Raw index list response: {indexes}")
-            print(f"DEBUG: Response type: {type(indexes)}")
-            print(f"DEBUG: Response structure: {json.dumps(indexes, indent=2) if isinstance(indexes, (dict, list)) else 'Not JSON serializable'}")
-            
             # Extract available indexes
-            available_indexes = []
-            try:
-                # Get the list of indexes from V2 API response
-                index_list = self._safe_get_value(indexes, 'indexes')
-                if not index_list:
-                    print(f"DEBUG: Could not find indexes in response")
-                    print(f"DEBUG: Response type: {type(indexes)}")
-                    print(f"DEBUG: Available attributes: {dir(indexes)}")
-                    return False
-
-                print(f"DEBUG: Found index_list type: {type(index_list)}")
-                print(f"DEBUG: Index list content: {index_list}")
-                
-                # Extract names from the index objects
-                for idx in index_list:
-                    name = self._safe_get_value(idx, 'name')
-                    if name:
-                        available_indexes.append(name)
-                    else:
-                        print(f"DEBUG: Could not extract name from index: {idx}")
-                        
-                print(f"DEBUG: Extracted names: {available_indexes}")
-            except Exception as e:
-                print(f"DEBUG: Error extracting names: {str(e)}")
-                print(f"DEBUG: Response dump: {indexes}")
-                if hasattr(indexes, '__dict__'):
-                    print(f"DEBUG: Object attributes: {indexes.__dict__}")
-                
-            print(f"DEBUG: Available indexes: {available_indexes}")
+            available_indexes = self._extract_index_names_generic(indexes)
+            
+            if not available_indexes:
+                logger.debug("Could not find indexes in response of type %s", type(indexes).__name__)
+                return False
             
-            # Check if the index already exists
-            index_exists = self.index_name in available_indexes
+            logger.debug("Found %s indexes: %s", len(available_indexes), available_indexes)
             
-            # Also check for case-insensitive matches which might be causing confusion
-            case_insensitive_match = None
-            for idx in available_indexes:
-                if idx.lower() == self.index_name.lower() and idx != self.index_name:
-                    case_insensitive_match = idx
-                    print(f"DEBUG: Case-insensitive match found: '{idx}' vs target '{self.index_name}'")
-                    print(f"DEBUG: Consider updating your PINECONE_INDEX environment variable to use the exact case: '{idx}'")
+            # Map lowercased names to their canonical spelling so the existence check and
+            # the case-insensitive match are a single dict lookup
+            name_map = {name.lower(): name for name in available_indexes}
+            canonical = name_map.get(self.index_name.lower())
+            index_exists = canonical is not None
             
             # If the exact index doesn't exist but a case-insensitive match does, use that instead
-            if not index_exists and case_insensitive_match:
-                print(f"DEBUG: Using case-insensitive match '{case_insensitive_match}' instead of '{self.index_name}'")
-                self.index_name = case_insensitive_match
-                index_exists = True
+            if canonical and canonical != self.index_name:
+                logger.debug("Case-insensitive match found: '%s' vs target '%s'", canonical, self.index_name)
+                logger.debug("Consider updating your PINECONE_INDEX environment variable to use the exact case: '%s'", canonical)
+                logger.debug("Using case-insensitive match '%s' instead of '%s'", canonical, self.index_name)
+                self.index_name = canonical
             
-            print(f"DEBUG: Final result - Index '{self.index_name}' exists: {index_exists}")
+            logger.debug("Final result - Index '%s' exists: %s", self.index_name, index_exists)
             
             if not index_exists:
                 # If no specific index was requested, try to use any existing index 
                 # instead of creating a new one
                 if not os.getenv('PINECONE_INDEX') and available_indexes:
-                    print(f"DEBUG: No specific index was requested, and found {len(available_indexes)} existing indexes")
-                    print(f"DEBUG: Using existing index '{available_indexes[0]}' instead of creating a new one")
+                    logger.debug("No specific index was requested, and found %s existing indexes", len(available_indexes))
+                    logger.debug("Using existing index '%s' instead of creating a new one", available_indexes[0])
                     self.index_name = available_indexes[0]
                     return
                 
-                print(f"Index '{self.index_name}' not found. Creating...")
+                logger.info("Index '%s' not found. Creating...", self.index_name)
                 
                 # Create index based on API key format
                 try:
                     if not self.pinecone_region:
-                        print(f"ERROR: PINECONE_REGION is required for creating indexes with V2 API")
-                        print(f"Add PINECONE_REGION=us-east-1 to your .env file")
+                        logger.error("PINECONE_REGION is required for creating indexes with V2 API")
+                        logger.error("Add PINECONE_REGION=us-east-1 to your .env file")
                         raise ValueError("PINECONE_REGION environment variable is required but not set")
                     
-                    print(f"DEBUG: Creating index with ServerlessSpec")
-                    print(f"DEBUG: Using cloud={self.pinecone_cloud or 'aws'}, region={self.pinecone_region}")
+                    logger.debug("Creating index with ServerlessSpec")
+                    logger.debug("Using cloud=%s, region=%s", self.pinecone_cloud or 'aws', self.pinecone_region)
                     
                     try:
-                        pinecone.create_index(
+                        _with_retry(
+                            pinecone.create_index,
                             name=self.index_name,
                             dimension=1536,
                             metric="cosine",
@@ -458,275 +789,456 @@ class VectorDBService:
                                 region=self.pinecone_region
                             )
                         )
-                        print(f"Created new Pinecone index: {self.index_name}")
+                        logger.info("Created new Pinecone index: %s", self.index_name)
                     except Exception as create_err:
                         error_msg = str(create_err).lower()
                         # Check specifically for 409 conflict error
                         if "409" in error_msg or "already exists" in error_msg:
-                            print(f"INFO: Index '{self.index_name}' already exists (confirmed from 409 response)")
+                            logger.info("Index '%s' already exists (confirmed from 409 response)", self.index_name)
                             # This is not an error condition - the index exists which is what we want
                             return
-                        else:
-                            print(f"Error creating index: {str(create_err)}")
-                        raise create_err
+                        raise
                 except Exception as create_err:
                     error_msg = str(create_err).lower()
-                    print(f"Error creating index: {str(create_err)}")
+                    logger.error("Error creating index: %s", create_err)
                     
                     # Check if it's a quota-related error
                     if any(term in error_msg for term in ["quota", "limit", "max pods", "reached"]):
-                        print(f"QUOTA ERROR: Unable to create new index due to account limitations")
+                        logger.error("QUOTA ERROR: Unable to create new index due to account limitations")
                         
                         # If there are existing indexes, use one of them instead
                         if available_indexes:
-                            print(f"Found {len(available_indexes)} existing indexes")
-                            print(f"Using existing index '{available_indexes[0]}' instead of creating a new one")
+                            logger.info("Found %s existing indexes", len(available_indexes))
+                            logger.info("Using existing index '%s' instead of creating a new one", available_indexes[0])
                             self.index_name = available_indexes[0]
-                            print(f"Switched to using existing index: {self.index_name}")
+                            logger.info("Switched to using existing index: %s", self.index_name)
                         else:
-                            print(f"ERROR: No existing indexes available to use as fallback")
+                            logger.error("No existing indexes available to use as fallback")
                             if os.getenv('ALLOW_DEV_FALLBACK', '').lower() == 'true':
-                                print(f"WARNING: Using development fallback mode with mock implementation")
+                                logger.warning("Using development fallback mode with mock implementation")
                                 # The calling method will handle setting up mock implementation
                             else:
                                 raise ValueError("No Pinecone indexes available and unable to create new ones due to quota limits")
                     else:
-                        import traceback
-                        print(f"DEBUG: Full index creation error details:\n{traceback.format_exc()}")
+                        logger.debug("Full index creation error details:\n%s", traceback.format_exc())
                         raise ValueError(f"Failed to create Pinecone index: {str(create_err)}")
             else:
-                print(f"Pinecone index '{self.index_name}' already exists.")
+                logger.info("Pinecone index '%s' already exists.", self.index_name)
         except Exception as e:
             # Check if the error is a 409 Conflict (index already exists)
             if "409" in str(e) and "ALREADY_EXISTS" in str(e):
-                print(f"Index '{self.index_name}' already exists (verified from error response).")
+                logger.info("Index '%s' already exists (verified from error response).", self.index_name)
                 # This is actually not an error, the index exists which is what we want
                 return
             
-            print(f"Error ensuring index exists: {str(e)}")
-            import traceback
-            print(f"DEBUG: Full index creation error details:\n{traceback.format_exc()}")
+            logger.error("Error ensuring index exists: %s", e)
+            logger.debug("Full index creation error details:\n%s", traceback.format_exc())
             
             # If there are existing indexes, use one instead
             try:
-                indexes = self.pc.list_indexes()
-                available_indexes = []
-                
-                if isinstance(indexes, dict) and 'indexes' in indexes:
-                    available_indexes = [idx['name'] for idx in indexes['indexes'] if isinstance(idx, dict) and 'name' in idx]
+                indexes = _with_retry(self.pc.list_indexes)
+                available_indexes = self._extract_index_names_generic(indexes)
                 
                 if available_indexes:
-                    print(f"ERROR RECOVERY: Using existing index '{available_indexes[0]}' instead of '{self.index_name}'")
+                    logger.warning("ERROR RECOVERY: Using existing index '%s' instead of '%s'", available_indexes[0], self.index_name)
                     self.index_name = available_indexes[0]
                     return
             except Exception as recovery_err:
-                print(f"Failed to recover by using existing index: {str(recovery_err)}")
+                logger.error("Failed to recover by using existing index: %s", recovery_err)
             
             raise ValueError(f"Failed to ensure Pinecone index exists: {str(e)}")
     
-    def _generate_embedding(self, text: str) -> List[float]:
-        """Generate an embedding for a text using our embedding service"""
-        print(f"Generating embedding for text of length {len(text)} characters using embedding service")
+    def _generate_embedding(self, text: str, as_array: bool = False):
+        """Generate an embedding for a text using our embedding service.
+        
+        Returns a list of floats, or a read-only float32 numpy array when as_array is set.
+        """
+        cache_key = embedding_cache.make_key(getattr(self.embedding_service, 'model', ''), text)
+        embedding = embedding_cache.get(cache_key, as_array=as_array)
+        if embedding is not None:
+            logger.debug("Reusing cached embedding for text of length %s characters", len(text))
+            return embedding
+        
+        logger.debug("Generating embedding for text of length %s characters using embedding service", len(text))
         
         try:
             # Use our embedding service to generate the embedding
             embedding = self.embedding_service.generate_single_embedding(text)
             if embedding:
-                print(f"Successfully generated embedding of dimension {len(embedding)}")
+                logger.debug("Successfully generated embedding of dimension %s", len(embedding))
+                embedding_cache.put(cache_key, embedding)
+                if as_array:
+                    return np.asarray(embedding, dtype=np.float32)
                 return embedding
             else:
-                print(f"Failed to generate embedding via embedding service")
+                logger.error("Failed to generate embedding via embedding service")
                 raise ValueError("Failed to generate embedding: embedding service returned None")
         except Exception as e:
-            print(f"Error generating embedding: {str(e)}")
+            logger.error("Error generating embedding: %s", e)
             raise ValueError(f"Error generating embedding: {str(e)}")
     
+    def _generate_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """Generate embeddings for many texts, batching every cache miss into as few API calls as possible"""
+        model = getattr(self.embedding_service, 'model', '')
+        cache_keys = [embedding_cache.make_key(model, text) for text in texts]
+        embeddings = [embedding_cache.get(key) for key in cache_keys]
+        
+        # Repeated chunks (headers, footers, boilerplate) share a key, so each distinct
+        # text is embedded once and the result is scattered back to every position
+        missing = {}
+        for i, embedding in enumerate(embeddings):
+            if embedding is None:
+                missing.setdefault(cache_keys[i], []).append(i)
+        
+        if missing:
+            logger.debug("Generating %s embeddings for %s texts (the rest served from cache)", len(missing), len(texts))
+            try:
+                generated = self.embedding_service.generate_embeddings(
+                    [texts[positions[0]] for positions in missing.values()], fallback_to_mock=False
+                )
+            except Exception as e:
+                logger.error("Error generating embeddings: %s", e)
+                raise ValueError(f"Error generating embeddings: {str(e)}")
+            for positions, embedding in zip(missing.values(), generated):
+                for i in positions:
+                    embeddings[i] = embedding
+            embedding_cache.put_many(zip(missing.keys(), generated))
+        
+        return embeddings
+    
+    def _get_s3_service(self):
+        """Return the S3Service used for chunk text, creating it on first use"""
+        if self._s3_service is None:
+            # Imported here because S3Service itself imports this module lazily
+            from app.services.s3_service import S3Service
+            self._s3_service = S3Service()
+        return self._s3_service
+    
+    def _store_chunk_texts(self, doc_id: str, indexed_chunks: List[Tuple[int, str]]) -> Dict[int, str]:
+        """Upload each chunk's full text to S3 concurrently and return the object key per chunk index"""
+        s3_service = self._get_s3_service()
+        text_keys = {chunk_index: f"{s3_service.chunk_text_folder}/{doc_id}/{chunk_index}.txt" for chunk_index, _ in indexed_chunks}
+        
+        def upload(chunk_index, chunk):
+            s3_service.s3_client.put_object(
+                Bucket=s3_service.master_bucket,
+                Key=text_keys[chunk_index],
+                Body=chunk.encode('utf-8')
+            )
+        
+        if indexed_chunks:
+            with ThreadPoolExecutor(max_workers=min(CROSS_NAMESPACE_MAX_WORKERS, len(indexed_chunks))) as executor:
+                # Iterating the results re-raises the first failed upload
+                list(executor.map(lambda item: upload(*item), indexed_chunks))
+        return text_keys
+    
+    def _hydrate_chunk_texts(self, results: List[Dict[str, Any]],
+                             fields: Tuple[Tuple[str, str], ...] = (("text_key", "text"),)) -> List[Dict[str, Any]]:
+        """Fill in the text of results whose chunk text is stored in S3, fetching only these results.
+        
+        fields pairs each S3 key field with the text field it fills; the key fields are removed afterwards.
+        """
+        pending = [(result, key_field, text_field) for result in results for key_field, text_field in fields if result.get(key_field)]
+        if not pending:
+            return results
+        s3_service = self._get_s3_service()
+        
+        def fetch(item):
+            result, key_field, text_field = item
+            try:
+                response = s3_service.s3_client.get_object(Bucket=s3_service.master_bucket, Key=result[key_field])
+                result[text_field] = response['Body'].read().decode('utf-8')
+            except Exception as e:
+                logger.warning("Could not fetch chunk text %s: %s", result[key_field], e)
+        
+        with ThreadPoolExecutor(max_workers=min(CROSS_NAMESPACE_MAX_WORKERS, len(pending))) as executor:
+            list(executor.map(fetch, pending))
+        for result, key_field, _ in pending:
+            del result[key_field]
+        return results
+    
+    def _delete_chunk_texts(self, doc_id: str):
+        """Delete a document's chunk text objects from S3 (a single list call when there are none)"""
+        s3_service = self._get_s3_service()
+        paginator = s3_service.s3_client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=s3_service.master_bucket, Prefix=f"{s3_service.chunk_text_folder}/{doc_id}/"):
+            keys = [{"Key": obj["Key"]} for obj in page.get('Contents', [])]
+            if keys:
+                s3_service.s3_client.delete_objects(Bucket=s3_service.master_bucket, Delete={"Objects": keys})
+    
+    def _discard_chunk_texts(self, doc_id: str):
+        """Best-effort _delete_chunk_texts for cleanup paths, where a failure must not mask the original error"""
+        try:
+            self._delete_chunk_texts(doc_id)
+        except Exception as e:
+            logger.warning("Could not delete chunk texts for document %s: %s", doc_id, e)
+    
     def store_document_chunks(self, doc_id: str, chunks: List[str], metadata: Dict[str, Any]) -> bool:
         """Store document chunks in the vector database"""
         if not self.pinecone_index or not self.openai_client:
             error_msg = f"Vector database not initialized for document {doc_id}. Cannot store chunks."
-            print(f"ERROR: {error_msg}")
+            logger.error(error_msg)
             raise ValueError(error_msg)
         
         try:
             # Check if there are an unusual number of chunks
             if len(chunks) > 1000:
-                print(f"WARNING: Unusually high number of chunks ({len(chunks)}) detected. Limiting to 1000 chunks.")
+                logger.warning("Unusually high number of chunks (%s) detected. Limiting to 1000 chunks.", len(chunks))
                 chunks = chunks[:1000]
             
-            print(f"Storing document chunks: {len(chunks)} chunks for document {doc_id}")
+            # Drop empty/whitespace-only chunks up front, keeping each chunk's original index
+            # so chunk ids and chunk_index metadata stay stable
+            indexed_chunks = [(index, chunk) for index, chunk in enumerate(chunks) if chunk and not chunk.isspace()]
+            
+            logger.info("Storing document chunks: %s chunks for document %s", len(indexed_chunks), doc_id)
             
             # Get namespace from folder or use default
             namespace = metadata.get("folder", "default")
+            filename = metadata.get("filename", "")
             
-            # Process chunks in batches to avoid rate limits and memory issues
-            batch_size = 10
-            total_vectors = 0
-            total_batches = (len(chunks) - 1) // batch_size + 1
+            # Embed every chunk up front: the embedding service sends large batches concurrently,
+            # instead of one request per chunk inside the upsert loop
+            embeddings = self._generate_embeddings([chunk for _, chunk in indexed_chunks])
             
-            for i in range(0, len(chunks), batch_size):
-                batch = chunks[i:i+batch_size]
-                current_batch = i // batch_size + 1
-                
-                if current_batch % 5 == 0 or current_batch <= 2 or current_batch == total_batches:
-                    print(f"Processing batch {current_batch}/{total_batches} ({len(batch)} chunks)")
-                
-                vectors = []
-                
-                for j, chunk in enumerate(batch):
-                    if not chunk.strip():
-                        continue
-                        
-                    chunk_id = f"{doc_id}_{i+j}"
-                    embedding = self._generate_embedding(chunk)
+            # With CHUNK_TEXT_IN_S3 the metadata carries only a key, keeping query responses small
+            text_keys = None
+            if CHUNK_TEXT_IN_S3:
+                try:
+                    text_keys = self._store_chunk_texts(doc_id, indexed_chunks)
+                except Exception:
+                    self._discard_chunk_texts(doc_id)
+                    raise
+            
+            # Process chunks in batches: each upsert has a fixed round-trip cost, so fewer, larger
+            # requests are much faster than many small ones
+            batch_size = PINECONE_UPSERT_BATCH_SIZE
+            total_batches = (len(indexed_chunks) - 1) // batch_size + 1
+            
+            def upsert_batch(current_batch, vectors):
+                try:
+                    result = _with_retry(
+                        self.pinecone_index.upsert,
+                        vectors=vectors,
+                        namespace=namespace
+                    )
                     
-                    if embedding:
-                        chunk_metadata = {
-                            "doc_id": doc_id,
-                            "chunk_index": i+j,
-                            "text": chunk[:500],
-                            "filename": metadata.get("filename", "")
-                        }
-                        
-                        vectors.append({
-                            "id": chunk_id,
-                            "values": embedding,
-                            "metadata": chunk_metadata
-                        })
-                
-                if vectors:
-                    try:
-                        result = self.pinecone_index.upsert(
-                            vectors=vectors,
-                            namespace=namespace
-                        )
-                        
-                        # Get upserted count from V2 API response
-                        upserted = result.get('upserted_count', 0)
-                        
-                        total_vectors += upserted
-                        vectors = []  # Clear vectors list to free memory
+                    return self._response_count(result, 'upserted_count')
+                except Exception as upsert_error:
+                    # A rejected batch shouldn't stop the others, but programming errors must surface
+                    if not _is_pinecone_api_error(upsert_error):
+                        raise
+                    logger.error("Error upserting batch %s: %s", current_batch, upsert_error)
+                    return 0
+            
+            # Upserts are network-bound, so keep several batches in flight at once
+            with ThreadPoolExecutor(max_workers=max(1, min(PINECONE_UPSERT_WORKERS, total_batches))) as executor:
+                futures = []
+                for i in range(0, len(indexed_chunks), batch_size):
+                    batch = indexed_chunks[i:i+batch_size]
+                    current_batch = i // batch_size + 1
+                    
+                    if current_batch % 5 == 0 or current_batch <= 2 or current_batch == total_batches:
+                        logger.info("Processing batch %s/%s (%s chunks)", current_batch, total_batches, len(batch))
+                    
+                    vectors = []
+                    
+                    for (chunk_index, chunk), embedding in zip(batch, embeddings[i:i+batch_size]):
+                        chunk_id = f"{doc_id}_{chunk_index}"
                         
-                    except Exception as upsert_error:
-                        print(f"Error upserting batch {current_batch}: {str(upsert_error)}")
-                        continue  # Try next batch
+                        if embedding:
+                            chunk_metadata = {
+                                "doc_id": doc_id,
+                                "chunk_index": chunk_index,
+                                "filename": filename
+                            }
+                            if text_keys is not None:
+                                chunk_metadata["text_key"] = text_keys[chunk_index]
+                            else:
+                                chunk_metadata["text"] = chunk[:500] if len(chunk) > 500 else chunk
+                            
+                            vectors.append({
+                                "id": chunk_id,
+                                "values": _compact_embedding(embedding),
+                                "metadata": chunk_metadata
+                            })
+                    
+                    if vectors:
+                        futures.append(executor.submit(upsert_batch, current_batch, vectors))
             
-            print(f"Successfully stored {total_vectors} vectors for document {doc_id}")
+            # Leaving the executor waits for every batch, so the cleanup below can't race an in-flight upsert
+            try:
+                total_vectors = sum(future.result() for future in futures)
+            except Exception:
+                if text_keys is not None:
+                    self._discard_chunk_texts(doc_id)
+                raise
+            
+            if not total_vectors and text_keys is not None:
+                # Nothing references the uploaded chunk texts, so don't leave them behind
+                self._discard_chunk_texts(doc_id)
+            
+            if total_vectors:
+                # New vectors (and possibly a new namespace) must be visible to the next search
+                self._invalidate_index_stats()
+                search_result_cache.invalidate_namespace(namespace)
+            
+            logger.info("Successfully stored %s vectors for document %s", total_vectors, doc_id)
             return total_vectors > 0
             
         except Exception as e:
-            print(f"Error storing document chunks: {str(e)}")
+            logger.error("Error storing document chunks: %s", e)
             traceback.print_exc()
             raise ValueError(f"Failed to store document chunks: {str(e)}")
     
-    def search_similar_chunks(self, query: str, top_k: int = 5, namespace: str = None) -> List[Dict[str, Any]]:
-        """Search for similar chunks to a query in a specific namespace"""
+    def search_similar_chunks(self, query: str, top_k: int = 5, namespace: str = None,
+                              filter_doc_ids: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """Search for similar chunks to a query in a specific namespace, optionally only within the given documents"""
         if not self.pinecone_index or not self.openai_client:
             error_msg = "Vector database not initialized. Cannot perform search."
-            print(f"ERROR: {error_msg}")
+            logger.error(error_msg)
             raise ValueError(error_msg)
         
         try:
-            print(f"{'='*80}")
-            print(f"VECTOR SEARCH: Starting search operation at {time.strftime('%H:%M:%S')}")
-            print(f"VECTOR SEARCH: Searching for chunks similar to: '{query[:50]}...' (query length: {len(query)})")
-            print(f"VECTOR SEARCH: Parameters: top_k={top_k}, namespace={namespace}")
-            print(f"VECTOR SEARCH: Current class implementation: {self.pinecone_index.__class__.__name__}")
+            logger.info("=" * 80)
+            logger.info("VECTOR SEARCH: Starting search operation at %s", time.strftime('%H:%M:%S'))
+            logger.info("VECTOR SEARCH: Searching for chunks similar to: '%s...' (query length: %s)", query[:50], len(query))
+            logger.info("VECTOR SEARCH: Parameters: top_k=%s, namespace=%s, filter_doc_ids=%s", top_k, namespace,
+                        len(filter_doc_ids) if filter_doc_ids else None)
+            logger.info("VECTOR SEARCH: Current class implementation: %s", self.pinecone_index.__class__.__name__)
+            
+            # Repeated queries skip both the embedding call and the Pinecone round-trip
+            cache_key = search_result_cache.make_key(query, top_k, namespace, filter_doc_ids)
+            cached_results = search_result_cache.get(cache_key)
+            if cached_results is not None:
+                logger.info("VECTOR SEARCH: Returning %s cached matches", len(cached_results))
+                return cached_results
+            
+            # An empty or missing namespace can't match anything, so skip the embedding and query
+            # round-trips. A cached "empty" answer is confirmed against fresh stats first, since
+            # another worker may have written to the namespace since the snapshot was taken.
+            if namespace:
+                try:
+                    namespace_empty = self._namespace_vector_count(namespace) == 0 and self._namespace_vector_count(namespace, max_age=0) == 0
+                except Exception as stats_error:
+                    logger.warning("VECTOR SEARCH: Could not check namespace stats, searching anyway: %s", stats_error)
+                    namespace_empty = False
+                if namespace_empty:
+                    logger.info("VECTOR SEARCH: Namespace %s has no vectors. Skipping search.", namespace)
+                    return []
             
             # Generate embedding for the query
-            print(f"VECTOR SEARCH: Generating embedding for query...")
-            query_start_time = time.time()
+            logger.info("VECTOR SEARCH: Generating embedding for query...")
+            query_start_time = time.perf_counter()
             query_embedding = self._generate_embedding(query)
-            embedding_time = time.time() - query_start_time
-            print(f"VECTOR SEARCH: Generated query embedding in {embedding_time:.2f} seconds")
-            print(f"VECTOR SEARCH: Embedding dimension: {len(query_embedding)}")
+            embedding_time = time.perf_counter() - query_start_time
+            logger.info("VECTOR SEARCH: Generated query embedding in %.2f seconds", embedding_time)
+            logger.info("VECTOR SEARCH: Embedding dimension: %s", len(query_embedding))
             
             # Execute Pinecone query
-            print(f"VECTOR SEARCH: Executing query in namespace: {namespace}")
-            results = self.pinecone_index.query(
+            logger.info("VECTOR SEARCH: Executing query in namespace: %s", namespace)
+            results = _with_retry(
+                self.pinecone_index.query,
                 vector=query_embedding,
                 top_k=top_k,
                 include_metadata=True,
+                filter=_doc_id_filter(filter_doc_ids),
                 namespace=namespace
             )
             
             # Format results for the V2 API response format
-            formatted_results = []
-            
             # Get matches from the V2 API response dictionary
             matches = results.get('matches', [])
-            for match in matches:
-                formatted_match = {
-                    "id": match.get('id'),
-                    "score": match.get('score', 0),
-                    "doc_id": match.get('metadata', {}).get('doc_id', ''),
-                    "text": match.get('metadata', {}).get('text', ''),
-                    "source": match.get('metadata', {}).get('source', ''),
-                    "filename": match.get('metadata', {}).get('filename', ''),
-                    "folder": match.get('metadata', {}).get('folder', ''),
-                    "namespace": namespace
-                }
-                formatted_results.append(formatted_match)
+            formatted_results = [self._format_match(match, namespace) for match in matches]
             
-            print(f"VECTOR SEARCH: Found {len(formatted_results)} matches")
+            logger.info("VECTOR SEARCH: Found %s matches", len(formatted_results))
             if formatted_results:
                 top_score = formatted_results[0]["score"]
-                print(f"VECTOR SEARCH: Top match score: {top_score:.4f}")
+                logger.info("VECTOR SEARCH: Top match score: %.4f", top_score)
             
+            self._hydrate_chunk_texts(formatted_results)
+            search_result_cache.put(cache_key, formatted_results)
             return formatted_results
             
         except Exception as e:
             error_type = type(e).__name__
-            print(f"VECTOR SEARCH ERROR ({error_type}): {str(e)}")
-            print(f"VECTOR SEARCH ERROR: Full error details:\n{traceback.format_exc()}")
+            logger.error("VECTOR SEARCH ERROR (%s): %s", error_type, e)
+            logger.error("VECTOR SEARCH ERROR: Full error details:\n%s", traceback.format_exc())
             raise ValueError(f"Vector search failed: {str(e)}")
     
     def delete_document(self, doc_id: str, namespace: str = None) -> bool:
         """Delete all chunks for a document"""
         if not self.pinecone_index:
             error_msg = "Vector database not initialized. Cannot delete document."
-            print(f"ERROR: {error_msg}")
+            logger.error(error_msg)
             raise ValueError(error_msg)
         
         try:
-            print(f"Deleting document {doc_id} from {'namespace ' + namespace if namespace else 'all namespaces'}")
+            logger.info("Deleting document %s from %s", doc_id, 'namespace ' + namespace if namespace else 'all namespaces')
+            failed_namespaces = []
             
             # If namespace is provided, delete only from that namespace
             if namespace:
-                result = self.pinecone_index.delete(
+                result = _with_retry(
+                    self.pinecone_index.delete,
                     filter={"doc_id": doc_id},
                     namespace=namespace
                 )
                 
-                # Get deleted count from V2 API response
-                deleted = result.get('deleted_count', 0)
-                print(f"Deleted {deleted} vectors from namespace {namespace}")
+                # Delete responses may not carry a count (gRPC never does)
+                deleted = self._response_count(result, 'deleted_count')
+                logger.info("Deleted %s vectors from namespace %s", deleted, namespace)
             else:
-                # If no namespace is provided, we need to find all namespaces that contain this document
-                stats = self.pinecone_index.describe_index_stats()
+                # If no namespace is provided, we need to find all namespaces that contain this document.
+                # Deletes bypass the cache so a namespace created by another worker isn't missed.
+                stats = self.get_index_stats(max_age=0)
                 
                 # Get namespaces from V2 API response
-                namespaces = stats.get("namespaces", {}).keys()
+                namespaces = (self._safe_get_value(stats, 'namespaces') or {}).keys()
                 
-                total_deleted = 0
-                for ns in namespaces:
-                    result = self.pinecone_index.delete(
+                def delete_from_namespace(ns):
+                    return _with_retry(
+                        self.pinecone_index.delete,
                         filter={"doc_id": doc_id},
                         namespace=ns
                     )
-                    
-                    # Get deleted count from V2 API response
-                    deleted = result.get('deleted_count', 0)
-                    
-                    total_deleted += deleted
-                    print(f"Deleted {deleted} vectors from namespace {ns}")
                 
-                print(f"Total vectors deleted across all namespaces: {total_deleted}")
+                # A filter delete only applies to one namespace, so fan the deletes out
+                # concurrently rather than paying one round-trip per namespace in sequence
+                total_deleted = 0
+                if namespaces:
+                    with ThreadPoolExecutor(max_workers=min(CROSS_NAMESPACE_MAX_WORKERS, len(namespaces))) as executor:
+                        futures = {executor.submit(delete_from_namespace, ns): ns for ns in namespaces}
+                        for future in as_completed(futures):
+                            ns = futures[future]
+                            # One failing namespace must not abandon the report for the others
+                            try:
+                                deleted = self._response_count(future.result(), 'deleted_count')
+                            except Exception as delete_error:
+                                logger.error("Error deleting document %s from namespace %s: %s", doc_id, ns, delete_error)
+                                failed_namespaces.append(ns)
+                                continue
+                            
+                            total_deleted += deleted
+                            logger.info("Deleted %s vectors from namespace %s", deleted, ns)
+                
+                logger.info("Total vectors deleted across all namespaces: %s", total_deleted)
+            
+            if CHUNK_TEXT_IN_S3:
+                self._discard_chunk_texts(doc_id)
             
+            # Cached stats and searches may still reference the deleted chunks
+            self._invalidate_index_stats()
+            if namespace:
+                search_result_cache.invalidate_namespace(namespace)
+            else:
+                search_result_cache.clear()
+            
+            if failed_namespaces:
+                raise ValueError(f"Delete failed in namespaces: {', '.join(sorted(failed_namespaces))}")
             return True
         except Exception as e:
-            print(f"Error deleting document from vector database: {str(e)}")
-            traceback.print_exc()
+            logger.error("Error deleting document from vector database: %s", e)
+            logger.error("Full delete error details:\n%s", traceback.format_exc())
             raise ValueError(f"Failed to delete document: {str(e)}")
     
     def store_document_metadata(self, doc_id: str, metadata: Dict[str, Any]) -> bool:
@@ -777,7 +1289,7 @@ class VectorDBService:
         
         try:
             # Get index stats to find all namespaces
-            stats = self.pinecone_index.describe_index_stats()
+            stats = self.get_index_stats()
             namespaces = list(stats.get("namespaces", {}).keys())
             
             return namespaces
@@ -795,8 +1307,8 @@ class VectorDBService:
         try:
             print(f"VECTOR DB: Deleting namespace '{namespace}'")
             
-            # Check if namespace exists
-            stats = self.pinecone_index.describe_index_stats()
+            # Check if namespace exists (fresh stats, a stale snapshot could skip a real delete)
+            stats = self.get_index_stats(max_age=0)
             if namespace not in stats.get("namespaces", {}):
                 print(f"VECTOR DB: Namespace '{namespace}' does not exist or is already empty.")
                 return True  # Success since it doesn't exist anyway
@@ -814,9 +1326,10 @@ class VectorDBService:
             )
             
             print(f"VECTOR DB: Successfully deleted namespace '{namespace}'")
+            search_result_cache.invalidate_namespace(namespace)
             
             # Verify the namespace is empty after deletion
-            stats_after = self.pinecone_index.describe_index_stats()
+            stats_after = self.get_index_stats(max_age=0)
             if namespace in stats_after.get("namespaces", {}):
                 remaining_vectors = stats_after.get("namespaces", {}).get(namespace, {}).get("vector_count", 0)
                 if remaining_vectors > 0:
@@ -827,108 +1340,157 @@ class VectorDBService:
                         namespace=namespace
                     )
                     print(f"VECTOR DB: Attempted second deletion approach for namespace '{namespace}'")
+                    self._invalidate_index_stats()
             
             return True
         except Exception as e:
             print(f"VECTOR DB ERROR: Error deleting namespace '{namespace}': {str(e)}")
-            import traceback
             traceback.print_exc()
             raise ValueError(f"Failed to delete namespace: {str(e)}")
     
-    def search_across_namespaces(self, query: str, top_k: int = 5) -> List[Dict[str, Any]]:
-        """Search for similar chunks across all namespaces"""
+    def _format_match(self, match, namespace: str) -> Dict[str, Any]:
+        """Format a query match for the V2 API response format"""
+        # Plain dicts skip the attribute probing in _safe_get_value
+        if isinstance(match, dict):
+            match_id, score, metadata = match.get('id'), match.get('score', 0), match.get('metadata')
+        else:
+            match_id, score, metadata = (self._safe_get_value(match, 'id'), self._safe_get_value(match, 'score') or 0,
+                                         self._safe_get_value(match, 'metadata'))
+        metadata = metadata or {}
+        result = {
+            "id": match_id,
+            "score": score,
+            "doc_id": metadata.get('doc_id', ''),
+            "text": metadata.get('text', ''),
+            "source": metadata.get('source', ''),
+            "filename": metadata.get('filename', ''),
+            "folder": metadata.get('folder', ''),
+            "namespace": namespace
+        }
+        # Chunk text stored in S3 is filled in later by _hydrate_chunk_texts
+        if 'text_key' in metadata:
+            result["text_key"] = metadata['text_key']
+        return result
+
+    def search_across_namespaces(self, query: str, top_k: int = 5, filter_doc_ids: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """Search for similar chunks across all namespaces, optionally only within the given documents"""
         if not self.pinecone_index or not self.openai_client:
             error_msg = "Vector database not initialized. Cannot search across namespaces."
-            print(f"ERROR: {error_msg}")
+            logger.error(error_msg)
             raise ValueError(error_msg)
         
         try:
-            print(f"VECTOR CROSS-NAMESPACE SEARCH: Searching for chunks similar to: '{query[:50]}...' (query length: {len(query)})")
-            print(f"VECTOR CROSS-NAMESPACE SEARCH: Parameters: top_k={top_k}")
+            logger.debug("VECTOR CROSS-NAMESPACE SEARCH: Searching for chunks similar to: '%s...' (query length: %s)", query[:50], len(query))
+            logger.debug("VECTOR CROSS-NAMESPACE SEARCH: Parameters: top_k=%s", top_k)
             
             # Get all namespaces
             namespaces = self.list_namespaces()
-            print(f"VECTOR CROSS-NAMESPACE SEARCH: Found {len(namespaces)} namespaces: {namespaces}")
+            logger.debug("VECTOR CROSS-NAMESPACE SEARCH: Found %s namespaces: %s", len(namespaces), namespaces)
             
             if not namespaces:
-                print(f"VECTOR CROSS-NAMESPACE SEARCH: No namespaces found. Returning empty results.")
+                logger.debug("VECTOR CROSS-NAMESPACE SEARCH: No namespaces found. Returning empty results.")
                 return []
             
             # Generate embedding for the query (do this once)
-            print(f"VECTOR CROSS-NAMESPACE SEARCH: Generating embedding for query...")
-            query_start_time = time.time()
-            query_embedding = self._generate_embedding(query)
-            embedding_time = time.time() - query_start_time
-            print(f"VECTOR CROSS-NAMESPACE SEARCH: Generated query embedding in {embedding_time:.2f} seconds")
+            logger.debug("VECTOR CROSS-NAMESPACE SEARCH: Generating embedding for query...")
+            query_start_time = time.perf_counter()
+            query_vector = self._generate_embedding(query, as_array=True)
+            # Materialize the list the SDK expects once and share it across every namespace query
+            query_embedding = query_vector.tolist()
+            embedding_time = time.perf_counter() - query_start_time
+            logger.debug("VECTOR CROSS-NAMESPACE SEARCH: Generated query embedding in %.2f seconds", embedding_time)
             
             # Search in each namespace
+            query_filter = _doc_id_filter(filter_doc_ids)
             all_results = []
-            all_start_time = time.time()
+            all_start_time = time.perf_counter()
+            
+            def query_namespace(namespace):
+                namespace_start_time = time.perf_counter()
+                results = _with_retry(
+                    self.pinecone_index.query,
+                    vector=query_embedding,
+                    top_k=top_k,
+                    include_metadata=True,
+                    filter=query_filter,
+                    namespace=namespace
+                )
+                return results, time.perf_counter() - namespace_start_time
             
-            for namespace in namespaces:
-                print(f"VECTOR CROSS-NAMESPACE SEARCH: Searching in namespace: {namespace}")
-                namespace_start_time = time.time()
-                
-                # Search Pinecone with namespace
+            combined_results = None
+            if hasattr(self.pinecone_index, 'query_namespaces'):
+                # Newer clients accept the whole namespace list in one call, so the
+                # query vector is serialized and uploaded once instead of once per namespace
                 try:
-                    results = self.pinecone_index.query(
+                    logger.debug("VECTOR CROSS-NAMESPACE SEARCH: Searching %s namespaces with query_namespaces", len(namespaces))
+                    combined_results = _with_retry(
+                        self.pinecone_index.query_namespaces,
                         vector=query_embedding,
+                        namespaces=namespaces,
                         top_k=top_k,
+                        metric='cosine',
                         include_metadata=True,
-                        namespace=namespace
+                        filter=query_filter
                     )
-                    
-                    # Format results for the V2 API response format
-                    for match in results.get('matches', []):
-                        all_results.append({
-                            "id": match.get('id'),
-                            "score": match.get('score', 0),
-                            "doc_id": match.get('metadata', {}).get('doc_id', ''),
-                            "text": match.get('metadata', {}).get('text', ''),
-                            "source": match.get('metadata', {}).get('source', ''),
-                            "filename": match.get('metadata', {}).get('filename', ''),
-                            "folder": match.get('metadata', {}).get('folder', ''),
-                            "namespace": namespace
-                        })
-                    
-                    namespace_time = time.time() - namespace_start_time
-                    print(f"VECTOR CROSS-NAMESPACE SEARCH: Found {len(results.get('matches', []))} matches in namespace '{namespace}' in {namespace_time:.2f} seconds")
-                    
-                except Exception as namespace_error:
-                    error_type = type(namespace_error).__name__
-                    print(f"VECTOR CROSS-NAMESPACE SEARCH ERROR ({error_type}): Error searching namespace '{namespace}': {str(namespace_error)}")
-            
-            total_search_time = time.time() - all_start_time
-            print(f"VECTOR CROSS-NAMESPACE SEARCH: Completed searches across all namespaces in {total_search_time:.2f} seconds")
-            print(f"VECTOR CROSS-NAMESPACE SEARCH: Found {len(all_results)} total matches across all namespaces")
+                except Exception as bulk_error:
+                    logger.warning("VECTOR CROSS-NAMESPACE SEARCH (%s): query_namespaces failed, falling back to per-namespace queries: %s",
+                                   type(bulk_error).__name__, bulk_error)
+                    combined_results = None
+            
+            if combined_results is not None:
+                all_results = [
+                    self._format_match(match, self._safe_get_value(match, 'namespace') or '')
+                    for match in self._safe_get_value(combined_results, 'matches') or []
+                ]
+            else:
+                # The queries are network-bound, so issue them concurrently: total latency is
+                # roughly one round-trip instead of one per namespace
+                logger.debug("VECTOR CROSS-NAMESPACE SEARCH: Searching %s namespaces concurrently", len(namespaces))
+                with ThreadPoolExecutor(max_workers=min(CROSS_NAMESPACE_MAX_WORKERS, len(namespaces))) as executor:
+                    futures = [(namespace, executor.submit(query_namespace, namespace)) for namespace in namespaces]
+                
+                # Collect in namespace order so equal scores keep a stable order
+                for namespace, future in futures:
+                    try:
+                        results, namespace_time = future.result()
+                        
+                        # Format results for the V2 API response format
+                        for match in results.get('matches', []):
+                            all_results.append(self._format_match(match, namespace))
+                        
+                        logger.debug("VECTOR CROSS-NAMESPACE SEARCH: Found %s matches in namespace '%s' in %.2f seconds",
+                                     len(results.get('matches', [])), namespace, namespace_time)
+                        
+                    except Exception as namespace_error:
+                        logger.error("VECTOR CROSS-NAMESPACE SEARCH (%s): Error searching namespace '%s': %s",
+                                     type(namespace_error).__name__, namespace, namespace_error)
             
-            # Sort by score (highest first)
-            all_results.sort(key=lambda x: x["score"], reverse=True)
+            total_search_time = time.perf_counter() - all_start_time
+            logger.debug("VECTOR CROSS-NAMESPACE SEARCH: Completed searches across all namespaces in %.2f seconds", total_search_time)
+            logger.debug("VECTOR CROSS-NAMESPACE SEARCH: Found %s total matches across all namespaces", len(all_results))
             
-            # Trim to top_k results
-            top_results = all_results[:top_k]
-            print(f"VECTOR CROSS-NAMESPACE SEARCH: Returning top {len(top_results)} results")
+            # Select the top_k results by score (highest first) without sorting every candidate
+            top_results = heapq.nlargest(top_k, all_results, key=itemgetter("score"))
+            self._hydrate_chunk_texts(top_results)
+            logger.debug("VECTOR CROSS-NAMESPACE SEARCH: Returning top %s results", len(top_results))
             
             # Log namespace distribution in final results
-            if top_results:
+            if top_results and logger.isEnabledFor(logging.DEBUG):
                 namespace_counts = {}
                 for result in top_results:
                     ns = result["namespace"]
                     namespace_counts[ns] = namespace_counts.get(ns, 0) + 1
                 
-                print(f"VECTOR CROSS-NAMESPACE SEARCH: Final results namespace distribution: {namespace_counts}")
+                logger.debug("VECTOR CROSS-NAMESPACE SEARCH: Final results namespace distribution: %s", namespace_counts)
                 
                 # Log score range
                 top_score = top_results[0]["score"] if top_results else 0
                 min_score = top_results[-1]["score"] if top_results else 0
-                print(f"VECTOR CROSS-NAMESPACE SEARCH: Score range in final results - min: {min_score:.4f}, max: {top_score:.4f}")
+                logger.debug("VECTOR CROSS-NAMESPACE SEARCH: Score range in final results - min: %.4f, max: %.4f", min_score, top_score)
             
             return top_results
         except Exception as e:
-            error_type = type(e).__name__
-            print(f"VECTOR CROSS-NAMESPACE SEARCH ERROR ({error_type}): {str(e)}")
-            import traceback
-            print(f"VECTOR CROSS-NAMESPACE SEARCH ERROR: Full error details:\n{traceback.format_exc()}")
+            logger.error("VECTOR CROSS-NAMESPACE SEARCH (%s): %s", type(e).__name__, e, exc_info=True)
             raise ValueError(f"Cross-namespace search failed: {str(e)}")
 
     def calculate_document_similarity(self, doc1_text: str, doc2_text: str, method: str = "embedding", 
@@ -1001,19 +1563,19 @@ class VectorDBService:
                 "prompt_model": prompt_model if custom_prompt else None
             }
             
-            start_time = time.time()
+            start_time = time.perf_counter()
             
             # Calculate embedding-based similarity
             if method in ["embedding", "hybrid"]:
                 # Generate embeddings for both documents
-                embedding1 = self._generate_embedding(doc1_text)
-                embedding2 = self._generate_embedding(doc2_text)
+                embedding1 = self._generate_embedding(doc1_text, as_array=True)
+                embedding2 = self._generate_embedding(doc2_text, as_array=True)
                 
                 # Calculate cosine similarity
                 # Formula: cos(θ) = (A·B) / (||A|| × ||B||)
-                dot_product = sum(a * b for a, b in zip(embedding1, embedding2))
-                magnitude1 = sum(a * a for a in embedding1) ** 0.5
-                magnitude2 = sum(b * b for b in embedding2) ** 0.5
+                dot_product = float(np.dot(embedding1, embedding2))
+                magnitude1 = float(np.linalg.norm(embedding1))
+                magnitude2 = float(np.linalg.norm(embedding2))
                 
                 embedding_similarity = dot_product / (magnitude1 * magnitude2)
                 result["embedding_similarity"] = embedding_similarity
@@ -1044,7 +1606,7 @@ class VectorDBService:
             if method == "hybrid":
                 result["similarity"] = (result["embedding_similarity"] + result["text_similarity"]) / 2
             
-            end_time = time.time()
+            end_time = time.perf_counter()
             result["comparison_time"] = end_time - start_time
             
             print(f"Calculated similarity score: {result['similarity']:.4f} using {method} method")
@@ -1054,7 +1616,6 @@ class VectorDBService:
         
         except Exception as e:
             print(f"Error calculating document similarity: {str(e)}")
-            import traceback
             traceback.print_exc()
             raise ValueError(f"Failed to calculate document similarity: {str(e)}")
 
@@ -1106,7 +1667,6 @@ class VectorDBService:
         
         except Exception as e:
             print(f"Error calculating document similarity by ID: {str(e)}")
-            import traceback
             traceback.print_exc()
             raise ValueError(f"Failed to calculate document similarity by ID: {str(e)}")
 
@@ -1136,7 +1696,7 @@ class VectorDBService:
                 "chunk_comparisons": 0
             }
             
-            start_time = time.time()
+            start_time = time.perf_counter()
             
             # Get all vectors for doc1
             doc1_filter = {"doc_id": doc1_id}
@@ -1152,9 +1712,10 @@ class VectorDBService:
             max_chunks_to_compare = 1000  # Set a reasonable limit
             
             # First get doc1 chunks
-            doc1_results = self.pinecone_index.query(
+            doc1_results = _with_retry(
+                self.pinecone_index.query,
                 filter=doc1_filter,
-                vector=[0.0] * 1536,  # Dummy vector, we're only using the filter
+                vector=_FILTER_ONLY_QUERY_VECTOR,  # Dummy vector, we're only using the filter
                 top_k=max_chunks_to_compare,
                 include_metadata=True,
                 include_values=True,
@@ -1162,9 +1723,10 @@ class VectorDBService:
             )
             
             # Then get doc2 chunks
-            doc2_results = self.pinecone_index.query(
+            doc2_results = _with_retry(
+                self.pinecone_index.query,
                 filter=doc2_filter,
-                vector=[0.0] * 1536,  # Dummy vector, we're only using the filter
+                vector=_FILTER_ONLY_QUERY_VECTOR,  # Dummy vector, we're only using the filter
                 top_k=max_chunks_to_compare,
                 include_metadata=True,
                 include_values=True,
@@ -1178,7 +1740,6 @@ class VectorDBService:
             
             # If we have too many combinations, sample them
             if len(doc1_chunks) * len(doc2_chunks) > max_chunks_to_compare:
-                import random
                 # Sample chunks from both documents
                 if len(doc1_chunks) > 50:
                     doc1_chunks = random.sample(doc1_chunks, 50)
@@ -1186,34 +1747,44 @@ class VectorDBService:
                     doc2_chunks = random.sample(doc2_chunks, 50)
                 print(f"Sampled down to {len(doc1_chunks)} chunks for doc1 and {len(doc2_chunks)} chunks for doc2")
             
-            # Compare each chunk from doc1 with each chunk from doc2
-            for i, doc1_chunk in enumerate(doc1_chunks):
-                doc1_vector = doc1_chunk.get('values', [])
-                if not doc1_vector:
-                    continue
+            # Compare each chunk from doc1 with each chunk from doc2 as a single matrix product
+            # instead of three Python-level sums per pair. Chunks without values (or with
+            # all-zero values) can't be compared and are skipped.
+            def comparable(chunks):
+                pairs = [(index, chunk) for index, chunk in enumerate(chunks) if chunk.get('values')]
+                if not pairs:
+                    return pairs, None
+                matrix = np.array([chunk.get('values') for _, chunk in pairs], dtype=np.float64)
+                norms = np.linalg.norm(matrix, axis=1)
+                keep = norms > 0
+                return [pair for pair, kept in zip(pairs, keep) if kept], matrix[keep] / norms[keep, None]
+            
+            doc1_pairs, doc1_matrix = comparable(doc1_chunks)
+            doc2_pairs, doc2_matrix = comparable(doc2_chunks)
+            
+            if doc1_pairs and doc2_pairs:
+                similarity_matrix = doc1_matrix @ doc2_matrix.T
+                all_similarity_scores = similarity_matrix.ravel().tolist()
                 
-                for j, doc2_chunk in enumerate(doc2_chunks):
-                    doc2_vector = doc2_chunk.get('values', [])
-                    if not doc2_vector:
-                        continue
-                    
-                    # Calculate cosine similarity
-                    dot_product = sum(a * b for a, b in zip(doc1_vector, doc2_vector))
-                    magnitude1 = sum(a * a for a in doc1_vector) ** 0.5
-                    magnitude2 = sum(b * b for b in doc2_vector) ** 0.5
-                    
-                    chunk_similarity = dot_product / (magnitude1 * magnitude2)
-                    all_similarity_scores.append(chunk_similarity)
-                    
-                    # Keep track of top matches
-                    if chunk_similarity > 0.8:  # Adjust threshold as needed
-                        top_matches.append({
-                            "doc1_chunk": i,
-                            "doc2_chunk": j,
-                            "similarity": chunk_similarity,
-                            "doc1_text": doc1_chunk.get('metadata', {}).get('text', ''),
-                            "doc2_text": doc2_chunk.get('metadata', {}).get('text', '')
-                        })
+                # Keep track of top matches (np.nonzero yields pairs in the same row-major order as the loop it replaced)
+                for row, col in zip(*np.nonzero(similarity_matrix > 0.8)):  # Adjust threshold as needed
+                    i, doc1_chunk = doc1_pairs[row]
+                    j, doc2_chunk = doc2_pairs[col]
+                    doc1_md = doc1_chunk.get('metadata') or {}
+                    doc2_md = doc2_chunk.get('metadata') or {}
+                    match = {
+                        "doc1_chunk": i,
+                        "doc2_chunk": j,
+                        "similarity": float(similarity_matrix[row, col]),
+                        "doc1_text": doc1_md.get('text', ''),
+                        "doc2_text": doc2_md.get('text', '')
+                    }
+                    # With CHUNK_TEXT_IN_S3 the text is fetched later, only for the matches that are returned
+                    if 'text_key' in doc1_md:
+                        match["doc1_text_key"] = doc1_md['text_key']
+                    if 'text_key' in doc2_md:
+                        match["doc2_text_key"] = doc2_md['text_key']
+                    top_matches.append(match)
             
             # Sort top matches by similarity
             top_matches.sort(key=lambda x: x["similarity"], reverse=True)
@@ -1228,12 +1799,15 @@ class VectorDBService:
                 
                 result["similarity"] = avg_similarity
                 result["chunk_comparisons"] = len(all_similarity_scores)
-                result["top_matches"] = top_matches[:10]  # Include top 10 matches
+                result["top_matches"] = self._hydrate_chunk_texts(
+                    top_matches[:10],  # Include top 10 matches
+                    fields=(("doc1_text_key", "doc1_text"), ("doc2_text_key", "doc2_text"))
+                )
             else:
                 print("No chunk comparisons were performed")
                 result["similarity"] = 0.0
             
-            end_time = time.time()
+            end_time = time.perf_counter()
             result["comparison_time"] = end_time - start_time
             
             print(f"Calculated chunk similarity score: {result['similarity']:.4f}")
@@ -1246,7 +1820,6 @@ class VectorDBService:
         
         except Exception as e:
             print(f"Error calculating chunked document similarity: {str(e)}")
-            import traceback
             traceback.print_exc()
             raise ValueError(f"Failed to calculate chunked document similarity: {str(e)}")
 
@@ -1333,7 +1906,8 @@ class VectorDBService:
             doc_embedding = self._generate_embedding(doc_text)
             
             # Search for similar documents using the embedding
-            results = self.pinecone_index.query(
+            results = _with_retry(
+                self.pinecone_index.query,
                 vector=doc_embedding,
                 top_k=top_k * 3,  # Get more results than needed to filter by unique docs
                 include_metadata=True,
@@ -1344,18 +1918,20 @@ class VectorDBService:
             unique_docs = {}
             
             for match in results.get('matches', []):
-                match_doc_id = match.get('metadata', {}).get('doc_id', '')
+                md = match.get('metadata') or {}
+                match_doc_id = md.get('doc_id', '')
                 
                 # Skip the document itself
                 if match_doc_id == doc_id:
                     continue
                 
                 # Keep only the highest scoring match for each document
-                if match_doc_id not in unique_docs or match.get('score', 0) > unique_docs[match_doc_id]['score']:
+                score = match.get('score', 0)
+                if match_doc_id not in unique_docs or score > unique_docs[match_doc_id]['score']:
                     unique_docs[match_doc_id] = {
                         'doc_id': match_doc_id,
-                        'score': match.get('score', 0),
-                        'filename': match.get('metadata', {}).get('filename', ''),
+                        'score': score,
+                        'filename': md.get('filename', ''),
                         'namespace': namespace
                     }
             
@@ -1368,6 +1944,5 @@ class VectorDBService:
         
         except Exception as e:
             print(f"Error finding similar documents: {str(e)}")
-            import traceback
             traceback.print_exc()
             raise ValueError(f"Failed to find similar documents: {str(e)}")
\ No newline at end of file
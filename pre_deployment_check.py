@@ -2,33 +2,160 @@
 import os
 import json
 import sys
+import re
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+# orjson parses package.json much faster when it's installed; the standard library is used otherwise
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# Environment variables each service needs, as sets so missing ones are a single set difference
+BACKEND_REQUIRED_VARS = frozenset({
+    "AWS_ACCESS_KEY_ID",
+    "AWS_SECRET_ACCESS_KEY",
+    "AWS_REGION",
+    "OPENAI_API_KEY",
+    "METADATA_BUCKET",
+    "PINECONE_API_KEY",
+    "PINECONE_INDEX",
+    "PINECONE_CLOUD",
+    "PINECONE_REGION",
+})
+FRONTEND_REQUIRED_VARS = frozenset({"REACT_APP_API_URL"})
+
+# Both service names are found in a single pass over the raw bytes of render.yaml
+RENDER_SERVICE_PATTERN = re.compile(rb"document-processor-(api|frontend)")
+
+# Matches a plain (escape-free) "build" entry directly inside "scripts", so the common case needs no JSON parse
+BUILD_SCRIPT_PATTERN = re.compile(rb'"scripts"\s*:\s*\{[^{}]*?"build"\s*:\s*"([^"\\]*)"')
+
+# Directory listings, read once per directory and shared by every existence check.
+# The check stages run on worker threads; setdefault keeps the first result if two scan the same directory.
+_DIR_CACHE = {}
+
+def list_dir(directory):
+    """Return the names in directory (empty if it doesn't exist), scanning it at most once"""
+    if directory not in _DIR_CACHE:
+        try:
+            with os.scandir(directory) as entries:
+                names = {entry.name for entry in entries}
+        except (FileNotFoundError, NotADirectoryError):
+            names = set()
+        _DIR_CACHE.setdefault(directory, names)
+    return _DIR_CACHE[directory]
+
+# os.stat() results (None for missing files), so each inspected file is stat'ed once
+_STAT_CACHE = {}
+
+def stat_file(file_path):
+    if file_path not in _STAT_CACHE:
+        try:
+            stat = os.stat(file_path)
+        except FileNotFoundError:
+            stat = None
+        _STAT_CACHE.setdefault(file_path, stat)
+    return _STAT_CACHE[file_path]
+
+def file_exists(file_path):
+    directory, name = os.path.split(file_path)
+    return name in list_dir(directory or ".")
 
 def check_files_exist(files):
-    missing_files = []
-    for file_path in files:
-        if not os.path.exists(file_path):
-            missing_files.append(file_path)
-    return missing_files
+    return [file_path for file_path in files if not file_exists(file_path)]
+
+@functools.lru_cache(maxsize=None)
+def _read_bytes(file_path, mtime_ns):
+    """Return the raw contents of a file, read once per file version"""
+    with open(file_path, 'rb') as f:
+        return f.read()
+
+@functools.lru_cache(maxsize=None)
+def _load_dotenv(file_path, mtime_ns):
+    """Parse the variable names out of a .env file (values aren't needed), once per file version"""
+    data = _read_bytes(file_path, mtime_ns).decode('utf-8')
+    stripped = (line.strip() for line in data.splitlines())
+    return frozenset(line.partition('=')[0].strip() for line in stripped if line and not line.startswith('#'))
+
+@functools.lru_cache(maxsize=None)
+def _load_json(file_path, mtime_ns):
+    """Parse a JSON file from its raw bytes, once per file version"""
+    data = _read_bytes(file_path, mtime_ns)
+    return orjson.loads(data) if ORJSON_AVAILABLE else json.loads(data)
 
 def check_env_vars_in_dotenv(file_path, required_vars):
-    if not os.path.exists(file_path):
-        return required_vars, []
+    stat = stat_file(file_path)
+    if stat is None:
+        return sorted(required_vars), []
     
-    found_vars = []
-    with open(file_path, 'r') as f:
-        for line in f:
-            line = line.strip()
-            if line and not line.startswith('#'):
-                var_name = line.split('=')[0].strip()
-                found_vars.append(var_name)
+    found_vars = _load_dotenv(file_path, stat.st_mtime_ns)
+    return sorted(required_vars - found_vars), sorted(found_vars)
+
+def check_package_json(file_path):
+    """Report on the frontend build script in package.json, as a list of output lines"""
+    try:
+        stat = stat_file(file_path)
+        mtime_ns = stat and stat.st_mtime_ns
+        match = BUILD_SCRIPT_PATTERN.search(_read_bytes(file_path, mtime_ns))
+        if match:
+            return ["\n📦 Frontend Package.json:", f"  ✅ build script found: {match.group(1).decode('utf-8')}"]
+        
+        # Escaped strings, nested objects or a genuinely missing script: fall back to a full parse
+        scripts = _load_json(file_path, mtime_ns).get("scripts") or {}
+        if "build" in scripts:
+            return ["\n📦 Frontend Package.json:", f"  ✅ build script found: {scripts['build']}"]
+        return ["\n📦 Frontend Package.json:", "  ❌ No build script found in package.json. This is required for Render deployment."]
+    except Exception as e:
+        return [f"\n❌ Error checking package.json: {str(e)}"]
+
+def check_render_yaml(file_path):
+    """Report on the services configured in render.yaml, as a list of output lines"""
+    try:
+        stat = stat_file(file_path)
+        render_services = set(RENDER_SERVICE_PATTERN.findall(_read_bytes(file_path, stat and stat.st_mtime_ns)))
+    except Exception as e:
+        return [f"\n❌ Error checking render.yaml: {str(e)}"]
     
-    missing_vars = [var for var in required_vars if var not in found_vars]
-    return missing_vars, found_vars
+    return [
+        "\n🚀 Render.yaml:",
+        "  ✅ Backend service configuration found" if b"api" in render_services else "  ❌ Backend service configuration missing",
+        "  ✅ Frontend service configuration found" if b"frontend" in render_services else "  ❌ Frontend service configuration missing",
+    ]
+
+def report_required_files(files):
+    missing_files = check_files_exist(files)
+    if not missing_files:
+        return ["✅ All required files are present."]
+    return (["❌ Error: The following required files are missing:"]
+            + [f"  - {file}" for file in missing_files]
+            + ["\nPlease create these files before deploying."])
+
+def report_env_file(label, file_path, required_vars):
+    missing_vars, _ = check_env_vars_in_dotenv(file_path, required_vars)
+    lines = [f"\n📋 {label} Environment Variables (.env file):"]
+    if not file_exists(file_path):
+        lines.append(f"  ❌ {label} .env file not found. This is fine for Render deployment as you'll set them in the UI.")
+    elif missing_vars:
+        lines.append(f"  ✅ {label} .env file exists")
+        lines.append(f"  ❌ Missing required environment variables:")
+        lines.extend(f"    - {var}" for var in missing_vars)
+    else:
+        lines.append(f"  ✅ {label} .env file exists")
+        lines.append(f"  ✅ All required environment variables found")
+    return lines
+
+def report_inspected_file(label, file_path, check):
+    # A missing file is already listed by report_required_files; don't try to open it
+    if not file_exists(file_path):
+        return [f"\n❌ Error checking {label}: {file_path} is missing"]
+    return check(file_path)
 
 def main():
     print("🔍 Running pre-deployment check for Document Processor...\n")
     
-    # Check critical files
     required_files = [
         "render.yaml",
         "backend/requirements.txt", 
@@ -38,97 +165,30 @@ def main():
         "RENDER_DEPLOYMENT.md"
     ]
     
-    missing_files = check_files_exist(required_files)
-    
-    if missing_files:
-        print("❌ Error: The following required files are missing:")
-        for file in missing_files:
-            print(f"  - {file}")
-        print("\nPlease create these files before deploying.")
-    else:
-        print("✅ All required files are present.")
-    
-    # Check backend environment variables
     backend_env_file = "backend/.env"
-    backend_required_vars = [
-        "AWS_ACCESS_KEY_ID", 
-        "AWS_SECRET_ACCESS_KEY", 
-        "AWS_REGION",
-        "OPENAI_API_KEY",
-        "METADATA_BUCKET",
-        "PINECONE_API_KEY",
-        "PINECONE_INDEX",
-        "PINECONE_CLOUD",
-        "PINECONE_REGION",
-    ]
-    
-    backend_missing_vars, backend_found_vars = check_env_vars_in_dotenv(backend_env_file, backend_required_vars)
-    
-    print(f"\n📋 Backend Environment Variables (.env file):")
-    if os.path.exists(backend_env_file):
-        print(f"  ✅ Backend .env file exists")
-        if backend_missing_vars:
-            print(f"  ❌ Missing required environment variables:")
-            for var in backend_missing_vars:
-                print(f"    - {var}")
-        else:
-            print(f"  ✅ All required environment variables found")
-    else:
-        print(f"  ❌ Backend .env file not found. This is fine for Render deployment as you'll set them in the UI.")
-    
-    # Check frontend environment variables
     frontend_env_file = "frontend/.env"
-    frontend_required_vars = ["REACT_APP_API_URL"]
-    
-    frontend_missing_vars, frontend_found_vars = check_env_vars_in_dotenv(frontend_env_file, frontend_required_vars)
     
-    print(f"\n📋 Frontend Environment Variables (.env file):")
-    if os.path.exists(frontend_env_file):
-        print(f"  ✅ Frontend .env file exists")
-        if frontend_missing_vars:
-            print(f"  ❌ Missing required environment variables:")
-            for var in frontend_missing_vars:
-                print(f"    - {var}")
-        else:
-            print(f"  ✅ All required environment variables found")
-    else:
-        print(f"  ❌ Frontend .env file not found. This is fine for Render deployment as you'll set them in the UI.")
-    
-    # Check package.json for frontend
-    try:
-        with open("frontend/package.json", "r") as f:
-            package_json = json.load(f)
-        print("\n📦 Frontend Package.json:")
-        if "scripts" in package_json and "build" in package_json["scripts"]:
-            print(f"  ✅ build script found: {package_json['scripts']['build']}")
-        else:
-            print(f"  ❌ No build script found in package.json. This is required for Render deployment.")
-    except Exception as e:
-        print(f"\n❌ Error checking package.json: {str(e)}")
+    # The stages are independent and mostly wait on file I/O, so they run concurrently;
+    # each returns its status lines, which are printed in stage order
+    stages = [
+        (report_required_files, required_files),
+        (report_env_file, "Backend", backend_env_file, BACKEND_REQUIRED_VARS),
+        (report_env_file, "Frontend", frontend_env_file, FRONTEND_REQUIRED_VARS),
+        (report_inspected_file, "package.json", "frontend/package.json", check_package_json),
+        (report_inspected_file, "render.yaml", "render.yaml", check_render_yaml),
+    ]
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        futures = [executor.submit(*stage) for stage in stages]
+        out = [line for future in futures for line in future.result()]
     
-    # Check render.yaml
-    try:
-        with open("render.yaml", "r") as f:
-            render_yaml_content = f.read()
-        
-        print("\n🚀 Render.yaml:")
-        if "document-processor-api" in render_yaml_content:
-            print(f"  ✅ Backend service configuration found")
-        else:
-            print(f"  ❌ Backend service configuration missing")
-            
-        if "document-processor-frontend" in render_yaml_content:
-            print(f"  ✅ Frontend service configuration found")
-        else:
-            print(f"  ❌ Frontend service configuration missing")
-    except Exception as e:
-        print(f"\n❌ Error checking render.yaml: {str(e)}")
+    out.append("\n🔍 Pre-deployment check complete.")
+    out.append("\nReminder: Before deploying to Render, make sure you have:")
+    out.append("1. Configured all environment variables in Render UI or render.yaml")
+    out.append("2. Connected your GitHub repository to Render")
+    out.append("3. Read the RENDER_DEPLOYMENT.md for detailed instructions")
     
-    print("\n🔍 Pre-deployment check complete.")
-    print("\nReminder: Before deploying to Render, make sure you have:")
-    print("1. Configured all environment variables in Render UI or render.yaml")
-    print("2. Connected your GitHub repository to Render")
-    print("3. Read the RENDER_DEPLOYMENT.md for detailed instructions")
+    report = "\n".join(out) + "\n"
+    sys.stdout.write(report)
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file